@@ -12,6 +12,7 @@ sys.path.append(BASE_DIR)
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
 django.setup()
 
+from django.db import connections, transaction
 from foods.models import FoodEntry, Allergen
 from api.db_initialization.nutrition_score import calculate_nutrition_score
 
@@ -37,6 +38,30 @@ class FoodLoader:
             self.FoodEntry = food_entry_model
             self.Allergen = allergen_model
 
+        # Allergen name -> id, filled lazily so each name is looked up once
+        self._allergen_ids = None
+        # FoodEntry.name lookups follow the database: MySQL compares names
+        # case-insensitively, so update_or_create(name=...) matched "Olive Oil"
+        # and "Olive oil" to the same row there
+        db = self.FoodEntry.objects.db
+        self._case_insensitive_names = connections[db].vendor == "mysql"
+        # Migrations before 0016 keep micronutrients in a JSON column on
+        # FoodEntry; later models link them through FoodEntryMicronutrient
+        self._micronutrients_column = any(
+            field.name == "micronutrients"
+            for field in self.FoodEntry._meta.concrete_fields
+        )
+        # Name key -> id of the FoodEntry rows already in the database
+        self._entry_ids = None
+        # Everything below is queued by queue_food_entry() and written by save().
+        # Name key -> (index, name, FoodEntry field values)
+        self._pending_entries = {}
+        # Name key -> allergen ids, replacing the food's current allergens
+        self._pending_allergens = {}
+        # Name key -> {"Name (unit)": value}, replacing the food's current
+        # micronutrient links (only without the JSON column)
+        self._pending_micronutrients = {}
+
     def load_foods(self, json_file, limit=None):
         """Main entry point: load foods from JSON file."""
         json_file = Path(json_file)
@@ -58,7 +83,7 @@ class FoodLoader:
                     self.skipped += 1
                     continue
 
-                self.create_food_entry(food_data)
+                self.queue_food_entry(food_data, index=idx)
                 self.count += 1
             except Exception as e:
                 name = (
@@ -85,6 +110,8 @@ class FoodLoader:
                     # Print a short warning but do not raise to allow processing to continue
                     print(f"⚠️  {error_msg} (continuing)")
 
+        self.save()
+
         print(f"✓ Successfully loaded {self.count} foods.")
         print(f"⚠️  Skipped {self.skipped} foods (inputFoods >= 4).")
         print(f"❌ Failed: {self.failed}")
@@ -111,8 +138,10 @@ class FoodLoader:
         """
         foods = []
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
+        # One binary read and a single decode; JSON needs no newline
+        # translation, so skip the text layer's universal-newline pass
+        with open(filepath, "rb") as f:
+            content = f.read().decode("utf-8")
 
         # Try to parse the whole content as JSON first
         try:
@@ -135,25 +164,14 @@ class FoodLoader:
             if idx != -1:
                 start = content.find("[", idx)
                 if start != -1:
-                    depth = 0
-                    end = None
-                    i = start
-                    while i < len(content):
-                        ch = content[i]
-                        if ch == "[":
-                            depth += 1
-                        elif ch == "]":
-                            depth -= 1
-                            if depth == 0:
-                                end = i + 1
-                                break
-                        i += 1
-                    if end:
-                        arr_text = content[start:end]
-                        try:
-                            return json.loads(arr_text)
-                        except json.JSONDecodeError:
-                            pass
+                    # raw_decode parses just the array with the C scanner and
+                    # ignores whatever (possibly malformed) text follows it
+                    try:
+                        parsed, _ = json.JSONDecoder().raw_decode(content, start)
+                        if isinstance(parsed, list):
+                            return parsed
+                    except json.JSONDecodeError:
+                        pass
 
             # Final fallback: attempt JSONL parsing (one JSON object per line)
             for line in content.splitlines():
@@ -336,8 +354,170 @@ class FoodLoader:
 
         return allergens
 
-    def create_food_entry(self, food_data):
-        """Create or update a FoodEntry from JSON food data."""
+    def get_allergen_id(self, name):
+        """Return the id of the named allergen, creating it if needed."""
+        if self._allergen_ids is None:
+            self._allergen_ids = dict(
+                self.Allergen.objects.values_list("name", "id")
+            )
+        allergen_id = self._allergen_ids.get(name)
+        if allergen_id is None:
+            allergen_id = self.Allergen.objects.get_or_create(name=name)[0].id
+            self._allergen_ids[name] = allergen_id
+        return allergen_id
+
+    def save(self):
+        """Write every food queued by queue_food_entry() to the database.
+
+        Foods are keyed by name like update_or_create: names already in the
+        database are updated, the rest are inserted in the order they were
+        first seen, and a later food with the same name wins. A batch the
+        database rejects is retried row by row, so only the offending foods
+        are recorded as failures.
+        """
+        if self._entry_ids is None:
+            self._entry_ids = self._load_entry_ids()
+        self._save_food_entries()
+        self._save_allergen_links()
+        if not self._micronutrients_column:
+            self._save_micronutrient_links()
+
+    def _name_key(self, name):
+        """Key a FoodEntry name the way the database compares names."""
+        return name.casefold() if self._case_insensitive_names else name
+
+    def _load_entry_ids(self):
+        return {
+            self._name_key(name): entry_id
+            for name, entry_id in self.FoodEntry.objects.values_list("name", "id")
+        }
+
+    def _saved_entry_ids(self, pending):
+        """Ids of the saved foods among {name key: ...}; foods whose row
+        could not be saved have none."""
+        return {
+            key: self._entry_ids[key] for key in pending if key in self._entry_ids
+        }
+
+    def _save_food_entries(self):
+        to_create = []
+        to_update = []
+        for key, (index, name, values) in self._pending_entries.items():
+            entry_id = self._entry_ids.get(key)
+            if entry_id is None:
+                to_create.append((index, self.FoodEntry(name=name, **values)))
+            else:
+                to_update.append(
+                    (index, self.FoodEntry(id=entry_id, name=name, **values))
+                )
+
+        self._write_in_batches(
+            to_create,
+            lambda batch: self.FoodEntry.objects.bulk_create(batch),
+            lambda entry: entry.save(force_insert=True),
+        )
+        if to_update:
+            fields = list(next(iter(self._pending_entries.values()))[2])
+            self._write_in_batches(
+                to_update,
+                lambda batch: self.FoodEntry.objects.bulk_update(batch, fields),
+                lambda entry: entry.save(update_fields=fields),
+            )
+        if to_create:
+            # bulk_create does not set primary keys on MySQL, so read them back
+            self._entry_ids = self._load_entry_ids()
+        self._pending_entries = {}
+
+    def _write_in_batches(self, items, write_batch, write_one, batch_size=500):
+        """Write (index, entry) pairs in batches, falling back to one row at a
+        time for a batch that fails."""
+        db = self.FoodEntry.objects.db
+        for start in range(0, len(items), batch_size):
+            batch = items[start : start + batch_size]
+            try:
+                with transaction.atomic(using=db):
+                    write_batch([entry for _, entry in batch])
+                continue
+            except Exception:
+                pass
+
+            for index, entry in batch:
+                try:
+                    with transaction.atomic(using=db):
+                        write_one(entry)
+                except Exception as e:
+                    self.count -= 1
+                    self.failed += 1
+                    self.failures.append(
+                        {
+                            "index": index,
+                            "name": entry.name,
+                            "error": str(e),
+                            "trace": traceback.format_exc(),
+                        }
+                    )
+                    print(f"⚠️  Failed to save food '{entry.name}': {e} (continuing)")
+
+    def _save_allergen_links(self):
+        """Replace the allergens of the queued foods, like allergens.set(),
+        with one DELETE and one bulk INSERT."""
+        entry_ids = self._saved_entry_ids(self._pending_allergens)
+        Link = self.FoodEntry.allergens.through
+        Link.objects.filter(foodentry_id__in=entry_ids.values()).delete()
+        Link.objects.bulk_create(
+            [
+                Link(foodentry_id=entry_id, allergen_id=allergen_id)
+                for key, entry_id in entry_ids.items()
+                for allergen_id in self._pending_allergens[key]
+            ],
+            batch_size=1000,
+        )
+        self._pending_allergens = {}
+
+    def _save_micronutrient_links(self):
+        """Replace the micronutrient links of the queued foods, creating the
+        micronutrients that do not exist yet."""
+        from foods.serializers import parse_micronutrient_key
+
+        models = self.FoodEntry._meta.apps
+        Micronutrient = models.get_model("foods", "Micronutrient")
+        FEM = models.get_model("foods", "FoodEntryMicronutrient")
+
+        entry_ids = self._saved_entry_ids(self._pending_micronutrients)
+        links = [
+            (entry_id, *parse_micronutrient_key(micro_key), value)
+            for key, entry_id in entry_ids.items()
+            for micro_key, value in self._pending_micronutrients[key].items()
+        ]
+
+        micronutrient_ids = dict(Micronutrient.objects.values_list("name", "id"))
+        missing = {
+            name: unit for _, name, unit, _ in links if name not in micronutrient_ids
+        }
+        if missing:
+            Micronutrient.objects.bulk_create(
+                [Micronutrient(name=name, unit=unit) for name, unit in missing.items()],
+                ignore_conflicts=True,
+            )
+            micronutrient_ids = dict(Micronutrient.objects.values_list("name", "id"))
+
+        FEM.objects.filter(food_entry_id__in=entry_ids.values()).delete()
+        FEM.objects.bulk_create(
+            [
+                FEM(
+                    food_entry_id=entry_id,
+                    micronutrient_id=micronutrient_ids[name],
+                    value=value,
+                )
+                for entry_id, name, _, value in links
+            ],
+            batch_size=1000,
+        )
+        self._pending_micronutrients = {}
+
+    def queue_food_entry(self, food_data, index=None):
+        """Validate JSON food data and queue its FoodEntry; nothing is
+        written until save() is called (load_foods does this)."""
 
         # Extract basic information
         name = food_data.get("description", "").strip()
@@ -372,11 +552,7 @@ class FoodLoader:
         dietary_options = self.infer_dietary_options(name)
         allergen_names = self.infer_allergens(name)
 
-        # Pre-fetch allergen objects
-        allergen_objects = []
-        for allergen_name in allergen_names:
-            allergen, _ = self.Allergen.objects.get_or_create(name=allergen_name)
-            allergen_objects.append(allergen)
+        allergen_ids = [self.get_allergen_id(n) for n in allergen_names]
 
         # Calculate nutrition score first
         food_dict = {
@@ -393,26 +569,36 @@ class FoodLoader:
         if not (0.0 <= score <= 10.0):
             raise ValueError(f"Nutrition score out of bounds: {score}")
 
-        # Create or update the FoodEntry
-        food_entry, created = self.FoodEntry.objects.update_or_create(
-            name=name,
-            defaults={
-                "category": category,
-                "servingSize": serving_size,
-                "caloriesPerServing": normalized_calories,
-                "proteinContent": normalized_protein,
-                "fatContent": normalized_fat,
-                "carbohydrateContent": normalized_carbs,
-                "micronutrients": normalized_micronutrients,
-                "dietaryOptions": dietary_options,
-                "nutritionScore": score,
-                "imageUrl": "",
-            },
-        )
+        if self._entry_ids is None:
+            self._entry_ids = self._load_entry_ids()
+        key = self._name_key(name)
+        pending = self._pending_entries.get(key)
+        created = key not in self._entry_ids and pending is None
+
+        # Queue the FoodEntry. A later food with the same name overrides these
+        # values but keeps the first one's spelling and position, as
+        # update_or_create did.
+        if pending is not None:
+            index, name = pending[0], pending[1]
+        self._pending_entries[key] = index, name, {
+            "category": category,
+            "servingSize": serving_size,
+            "caloriesPerServing": normalized_calories,
+            "proteinContent": normalized_protein,
+            "fatContent": normalized_fat,
+            "carbohydrateContent": normalized_carbs,
+            "dietaryOptions": dietary_options,
+            "nutritionScore": score,
+            "imageUrl": "",
+        }
+        if self._micronutrients_column:
+            self._pending_entries[key][2]["micronutrients"] = normalized_micronutrients
+        else:
+            self._pending_micronutrients[key] = normalized_micronutrients
 
-        # Set allergens
-        if allergen_objects:
-            food_entry.allergens.set(allergen_objects)
+        # Like allergens.set(), only when the food has any
+        if allergen_ids:
+            self._pending_allergens[key] = allergen_ids
 
         action = "Created" if created else "Updated"
         print(
@@ -1,3 +1,8 @@
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
 from typing import cast
 from django.http import HttpResponse
 from django.test import TestCase
@@ -6,6 +11,7 @@ from rest_framework import status
 from unittest.mock import patch, Mock
 from django.urls import reverse
 from api.views import TranslationService  # Add this import
+from foods.models import Allergen, FoodEntry
 from django.urls import reverse
 
 
@@ -138,3 +144,100 @@ class TranslationServiceTest(TestCase):
             )
 
         self.assertIn("Translation service error", str(context.exception))
+
+
+class FoodLoaderTest(TestCase):
+    def _food(self, description, calories=120, micronutrients=None, grams=100):
+        nutrients = [
+            {"nutrient": {"number": "208"}, "amount": calories},
+            {"nutrient": {"number": "203"}, "amount": 2},
+        ]
+        for name, (unit, amount) in (micronutrients or {}).items():
+            nutrients.append(
+                {
+                    "nutrient": {"number": "999", "name": name, "unitName": unit},
+                    "amount": amount,
+                }
+            )
+        return {
+            "description": description,
+            "foodNutrients": nutrients,
+            "foodPortions": [{"sequenceNumber": 1, "gramWeight": grams}],
+        }
+
+    def _load(self, foods):
+        from api.db_initialization.load_food_from_json import FoodLoader
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "foods.json")
+            with open(path, "w") as f:
+                json.dump(foods, f)
+            loader = FoodLoader(skip_errors=True)
+            with redirect_stdout(StringIO()):
+                loader.load_foods(path)
+        return loader
+
+    def test_load_foods_writes_entries_allergens_and_micronutrients(self):
+        loader = self._load(
+            [
+                self._food("Loader Tofu Snack", micronutrients={"Iron, Fe": ("mg", 3)}),
+                self._food("Loader Plain Rice"),
+                self._food("Loader Heavy Portion", grams=5000),
+                # Same name again: the later food's values and allergens win
+                self._food(
+                    "Loader Tofu Snack",
+                    calories=300,
+                    micronutrients={"Loader Vitamin Z": ("µg", 5)},
+                ),
+            ]
+        )
+
+        self.assertEqual(loader.failed, 1)
+        self.assertFalse(FoodEntry.objects.filter(name="Loader Heavy Portion").exists())
+        self.assertTrue(FoodEntry.objects.filter(name="Loader Plain Rice").exists())
+
+        snack = FoodEntry.objects.get(name="Loader Tofu Snack")
+        self.assertEqual(snack.caloriesPerServing, 300)
+        self.assertEqual(
+            list(snack.allergens.values_list("name", flat=True)), ["soy"]
+        )
+        self.assertEqual(
+            {
+                link.micronutrient.name: (link.value, link.micronutrient.unit)
+                for link in snack.micronutrient_values.select_related("micronutrient")
+            },
+            {"Loader Vitamin Z": (5.0, "µg")},
+        )
+
+    def test_reloading_replaces_allergens(self):
+        self._load([self._food("Loader Tofu Snack")])
+        snack = FoodEntry.objects.get(name="Loader Tofu Snack")
+        snack.allergens.add(Allergen.objects.get_or_create(name="sesame")[0])
+
+        self._load([self._food("Loader Tofu Snack")])
+
+        self.assertEqual(
+            list(snack.allergens.values_list("name", flat=True)), ["soy"]
+        )
+
+
+class ORJSONRendererTest(TestCase):
+    def test_output_matches_drf_json_renderer(self):
+        from datetime import date, datetime, timezone as dt_timezone
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from project.utils.renderers import ORJSONRenderer
+
+        data = {
+            "price": Decimal("12.50"),
+            "created": datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "day": date(2025, 3, 1),
+            "name": "Crème brûlée \u2028 ümlaut \u2029 食べ物",
+            1: [1.5, None, True],
+        }
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+        # Integers orjson cannot encode fall back to DRF's renderer
+        data["big"] = 2**70
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
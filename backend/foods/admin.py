@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import prefetch_related_objects
 from rest_framework import viewsets, status, serializers
 from rest_framework.response import Response
 from rest_framework.permissions import BasePermission
@@ -12,7 +13,12 @@ from .models import (
     PriceCategoryThreshold,
     PriceReport,
 )
-from .services import approve_food_proposal, reject_food_proposal
+from .serializers import micronutrient_rows, parse_micronutrient_key
+from .services import (
+    approve_food_proposal,
+    approve_food_proposals,
+    reject_food_proposal,
+)
 
 
 @admin.register(FoodEntry)
@@ -50,6 +56,7 @@ class AdminFoodProposal(admin.ModelAdmin):
     search_fields = ("food_entry__name",)
     list_filter = ("isApproved",)
     readonly_fields = ("createdAt", "proposedBy", "food_entry")
+    actions = ["approve_proposals"]
 
     def get_food_name(self, obj):
         return obj.food_entry.name if obj.food_entry else "N/A"
@@ -59,6 +66,12 @@ class AdminFoodProposal(admin.ModelAdmin):
         return obj.food_entry.category if obj.food_entry else "N/A"
     get_food_category.short_description = "Category"
 
+    def approve_proposals(self, request, queryset):
+        count = approve_food_proposals(queryset, changed_by=request.user)
+        self.message_user(request, f"{count} food proposal(s) approved.")
+
+    approve_proposals.short_description = "Approve selected proposals"
+
     def has_add_permission(self, request):
         return False
 
@@ -70,8 +83,14 @@ class AdminFoodProposal(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         if change:
-            old_obj = FoodProposal.objects.get(pk=obj.pk)
-            old_status = old_obj.isApproved
+            # The status snapshot is taken in FoodProposal.from_db, which saves
+            # re-fetching the row; fall back to a narrow query if it is missing.
+            if hasattr(obj, "_loaded_isApproved"):
+                old_status = obj._loaded_isApproved
+            else:
+                old_status = (
+                    FoodProposal.objects.only("isApproved").get(pk=obj.pk).isApproved
+                )
         else:
             old_status = None
 
@@ -105,6 +124,10 @@ class IsAdminUser(BasePermission):
         )
 
 
+def _as_float(value):
+    return None if value is None else float(value)
+
+
 class FoodProposalModerationSerializer(serializers.ModelSerializer):
     # ---- FoodEntry fields (flat, read-only) ----
     name = serializers.CharField(source="food_entry.name", read_only=True)
@@ -160,6 +183,51 @@ class FoodProposalModerationSerializer(serializers.ModelSerializer):
             "createdAt",
         ]
 
+    def to_representation(self, instance):
+        """
+        Build the payload directly rather than dispatching through every
+        declared field; the declared fields still document the schema.
+        """
+        food_entry = instance.food_entry
+        if food_entry is not None:
+            food_data = {
+                "name": food_entry.name,
+                "category": food_entry.category,
+                "servingSize": _as_float(food_entry.servingSize),
+                "caloriesPerServing": _as_float(food_entry.caloriesPerServing),
+                "proteinContent": _as_float(food_entry.proteinContent),
+                "fatContent": _as_float(food_entry.fatContent),
+                "carbohydrateContent": _as_float(food_entry.carbohydrateContent),
+                "dietaryOptions": [str(opt) for opt in food_entry.dietaryOptions],
+                "nutritionScore": _as_float(food_entry.nutritionScore),
+            }
+        else:
+            food_data = dict.fromkeys(
+                (
+                    "name",
+                    "category",
+                    "servingSize",
+                    "caloriesPerServing",
+                    "proteinContent",
+                    "fatContent",
+                    "carbohydrateContent",
+                    "dietaryOptions",
+                    "nutritionScore",
+                )
+            )
+
+        return {
+            "id": instance.id,
+            **food_data,
+            "imageUrl": self.get_imageUrl(instance),
+            "micronutrients": self.get_micronutrients(instance),
+            "isApproved": instance.isApproved,
+            "proposedBy": self.get_proposedBy(instance),
+            "createdAt": self.fields["createdAt"].to_representation(
+                instance.createdAt
+            ),
+        }
+
     def get_imageUrl(self, obj):
         """Return the food entry's image URL, or empty string if not set."""
         if obj.food_entry and obj.food_entry.imageUrl:
@@ -167,6 +235,8 @@ class FoodProposalModerationSerializer(serializers.ModelSerializer):
         return ""
 
     def get_proposedBy(self, obj):
+        if obj.proposedBy is None:
+            return None
         return {
             "id": obj.proposedBy.id,
             "username": obj.proposedBy.username,
@@ -180,10 +250,9 @@ class FoodProposalModerationSerializer(serializers.ModelSerializer):
             return {}
 
         result = {}
-        for link in obj.food_entry.micronutrient_values.all():
+        for name, unit, value in micronutrient_rows(obj.food_entry):
             # Combine name and unit into key: "Vitamin C (mg)"
-            key = f"{link.micronutrient.name} ({link.micronutrient.unit})"
-            result[key] = round(link.value, 2)
+            result[f"{name} ({unit})"] = round(value, 2)
         return result
 
 
@@ -224,15 +293,55 @@ class FoodProposalModerationViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = (
         FoodProposal.objects.all()
         .select_related("proposedBy", "food_entry")
-        .prefetch_related("food_entry__allergens")
+        .prefetch_related(
+            "food_entry__allergens",
+            "food_entry__micronutrient_values__micronutrient",
+        )
     )
     serializer_class = FoodProposalModerationSerializer
     permission_classes = [IsAdminUser]
 
+    # Columns read by FoodProposalModerationSerializer; list/retrieve load only these
+    READ_ONLY_FIELDS = (
+        "id",
+        "isApproved",
+        "createdAt",
+        "proposedBy__id",
+        "proposedBy__username",
+        "food_entry__id",
+        "food_entry__name",
+        "food_entry__category",
+        "food_entry__servingSize",
+        "food_entry__caloriesPerServing",
+        "food_entry__proteinContent",
+        "food_entry__fatContent",
+        "food_entry__carbohydrateContent",
+        "food_entry__dietaryOptions",
+        "food_entry__nutritionScore",
+        "food_entry__imageUrl",
+    )
+
+    # Scalar FoodEntry columns a moderator may change via the edit action
+    EDITABLE_FIELDS = (
+        "name",
+        "category",
+        "servingSize",
+        "caloriesPerServing",
+        "proteinContent",
+        "fatContent",
+        "carbohydrateContent",
+        "dietaryOptions",
+        "imageUrl",
+    )
+
     def get_queryset(self):
         """Filter queryset based on approval status."""
         queryset = super().get_queryset()
 
+        # approve/edit go on to read and write price fields, so keep full rows there
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.only(*self.READ_ONLY_FIELDS)
+
         is_approved = self.request.query_params.get("isApproved")
         # isApproved is now a NullBooleanField:
         # null = pending (not yet reviewed)
@@ -289,37 +398,16 @@ class FoodProposalModerationViewSet(viewsets.ReadOnlyModelViewSet):
         data = serializer.validated_data
 
         # Update food entry fields
-        if "name" in data:
-            food_entry.name = data["name"]
-        if "category" in data:
-            food_entry.category = data["category"]
-        if "servingSize" in data:
-            food_entry.servingSize = data["servingSize"]
-        if "caloriesPerServing" in data:
-            food_entry.caloriesPerServing = data["caloriesPerServing"]
-        if "proteinContent" in data:
-            food_entry.proteinContent = data["proteinContent"]
-        if "fatContent" in data:
-            food_entry.fatContent = data["fatContent"]
-        if "carbohydrateContent" in data:
-            food_entry.carbohydrateContent = data["carbohydrateContent"]
-        if "dietaryOptions" in data:
-            food_entry.dietaryOptions = data["dietaryOptions"]
-        if "imageUrl" in data:
-            food_entry.imageUrl = data["imageUrl"]
+        changed_fields = [field for field in self.EDITABLE_FIELDS if field in data]
+        for field in changed_fields:
+            setattr(food_entry, field, data[field])
 
         # Update micronutrients
         # micronutrients_data format: {"Vitamin C (mg)": 28.1, "Iron, Fe (mg)": 2.7}
         if "micronutrients" in data:
             micronutrients_data = data["micronutrients"]
             for micro_name_with_unit, value in micronutrients_data.items():
-                # Parse micronutrient name and unit from format "Name (unit)"
-                if "(" in micro_name_with_unit and ")" in micro_name_with_unit:
-                    name_part = micro_name_with_unit.split("(")[0].strip()
-                    unit_part = micro_name_with_unit.split("(")[1].split(")")[0].strip()
-                else:
-                    name_part = micro_name_with_unit
-                    unit_part = "g"
+                name_part, unit_part = parse_micronutrient_key(micro_name_with_unit)
 
                 # Get or create the micronutrient
                 micronutrient, _ = Micronutrient.objects.get_or_create(
@@ -333,10 +421,17 @@ class FoodProposalModerationViewSet(viewsets.ReadOnlyModelViewSet):
                     defaults={"value": value}
                 )
 
-        food_entry.save()
+        # Only write the columns that were actually edited
+        if changed_fields:
+            food_entry.save(update_fields=changed_fields)
 
-        # Refresh proposal from database
-        proposal.refresh_from_db()
+        # food_entry was updated in place, so no refresh is needed; only the
+        # prefetched micronutrients are stale (as in DRF's UpdateModelMixin)
+        if "micronutrients" in data:
+            food_entry._prefetched_objects_cache = {}
+            prefetch_related_objects(
+                [food_entry], "micronutrient_values__micronutrient"
+            )
 
         # Return updated proposal
         response_serializer = FoodProposalModerationSerializer(proposal)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class FoodsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "foods"
+
+    def ready(self):
+        # Register Pillow's format plugins at startup rather than on the first
+        # image opened by a request or worker thread (ImageField validation of
+        # uploads, cached images), where registration runs under the import lock.
+        from PIL import Image
+
+        Image.init()
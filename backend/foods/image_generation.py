@@ -14,8 +14,8 @@ Usage:
 """
 
 import os
+import re
 import logging
-import requests
 import threading
 from io import BytesIO
 from typing import Optional
@@ -24,6 +24,54 @@ from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Characters replaced with "_" when deriving a Cloudinary public_id from a food name
+_PUBLIC_ID_TABLE = str.maketrans({char: "_" for char in " ,/()'\"&"})
+_UNDERSCORE_RUNS = re.compile(r"_+")
+
+# Apple emoji-style prompt for consistent, appetizing food images
+_PROMPT_TEMPLATE = """Create a high-quality Apple-style emoji of the food item: {food_name}.
+The image should depict the food ready to be eaten.
+Style: Signature Apple emoji style - 3D, glossy, highly detailed, vibrant colors, smooth vector-like appearance.
+Context: Isolated on a completely transparent background with a slight drop shadow.
+CRITICAL: It must look appetizing and edible. 
+- For animals (e.g., crab, fish, chicken), show it as a PREPARED FOOD DISH or MEAT (e.g., cooked crab legs, grilled fish), NOT as a cute living character or cartoon animal.
+- For ingredients (e.g., peanut butter, flour), show it in a natural, appetizing presentation (e.g., peanut butter on a spoon or in a jar, but stylized).
+DO NOT include any text, letters, numbers, or labels. The image must contain only the food item itself."""
+
+# Static part of the Fal request body; only the prompt varies per call
+_FAL_PAYLOAD_BASE = {
+    "image_size": "1024x1024",
+    "background": "transparent",
+    "quality": "high",
+    "num_images": 1,
+    "output_format": "png",
+}
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+# Configured cloudinary module; unset until Cloudinary is configured
+_cloudinary = None
+
+# FoodEntry ids with an image generation thread currently running in this process
+_inflight_ids: set[int] = set()
+_inflight_lock = threading.Lock()
+
+
+def _get_http_client():
+    """
+    Return a process-wide httpx client so Fal API calls and image downloads
+    reuse pooled keep-alive connections instead of reconnecting each time.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                import httpx
+
+                _http_client = httpx.Client(timeout=30)
+    return _http_client
+
 
 def _get_fal_client():
     """
@@ -50,7 +98,15 @@ def _get_cloudinary():
     """
     Lazily import and configure cloudinary.
     Returns None if Cloudinary is not configured.
+    
+    Once configured, the module is kept for the rest of the process so
+    uploads don't re-read settings or rebuild the config. A missing
+    configuration is not remembered and is checked again on the next call.
     """
+    global _cloudinary
+    if _cloudinary is not None:
+        return _cloudinary
+
     cloud_name = getattr(settings, 'CLOUDINARY_CLOUD_NAME', None) or os.environ.get('CLOUDINARY_CLOUD_NAME')
     api_key = getattr(settings, 'CLOUDINARY_API_KEY', None) or os.environ.get('CLOUDINARY_API_KEY')
     api_secret = getattr(settings, 'CLOUDINARY_API_SECRET', None) or os.environ.get('CLOUDINARY_API_SECRET')
@@ -68,6 +124,7 @@ def _get_cloudinary():
             api_key=api_key,
             api_secret=api_secret
         )
+        _cloudinary = cloudinary
         return cloudinary
     except ImportError:
         logger.error("cloudinary not installed. Run: pip install cloudinary")
@@ -85,22 +142,11 @@ def _generate_image_with_fal(food_name: str) -> Optional[str]:
         URL of the generated image from Fal, or None if generation fails
     """
     import time
-    import httpx
     
     fal_key = os.environ.get('FAL_KEY')
     if not fal_key:
         return None
     
-    # Apple emoji-style prompt for consistent, appetizing food images
-    prompt = f"""Create a high-quality Apple-style emoji of the food item: {food_name}.
-The image should depict the food ready to be eaten.
-Style: Signature Apple emoji style - 3D, glossy, highly detailed, vibrant colors, smooth vector-like appearance.
-Context: Isolated on a completely transparent background with a slight drop shadow.
-CRITICAL: It must look appetizing and edible. 
-- For animals (e.g., crab, fish, chicken), show it as a PREPARED FOOD DISH or MEAT (e.g., cooked crab legs, grilled fish), NOT as a cute living character or cartoon animal.
-- For ingredients (e.g., peanut butter, flour), show it in a natural, appetizing presentation (e.g., peanut butter on a spoon or in a jar, but stylized).
-DO NOT include any text, letters, numbers, or labels. The image must contain only the food item itself."""
-
     try:
         logger.info(f"Generating AI image for: {food_name}")
         print(f"[AI Image] Submitting request to Fal AI for: {food_name}")
@@ -110,53 +156,46 @@ DO NOT include any text, letters, numbers, or labels. The image must contain onl
             "Content-Type": "application/json"
         }
         
-        payload = {
-            "prompt": prompt,
-            "image_size": "1024x1024",
-            "background": "transparent",
-            "quality": "high",
-            "num_images": 1,
-            "output_format": "png"
-        }
+        payload = {**_FAL_PAYLOAD_BASE, "prompt": _PROMPT_TEMPLATE.format(food_name=food_name)}
+        
+        client = _get_http_client()
         
         # Submit the request
-        with httpx.Client(timeout=30) as client:
-            submit_response = client.post(
-                "https://queue.fal.run/fal-ai/gpt-image-1-mini",
-                headers=headers,
-                json=payload
-            )
-            submit_response.raise_for_status()
-            submit_data = submit_response.json()
-            
-            request_id = submit_data.get("request_id")
-            status_url = submit_data.get("status_url") or f"https://queue.fal.run/fal-ai/gpt-image-1-mini/requests/{request_id}/status"
-            
-            print(f"[AI Image] Request submitted, ID: {request_id}")
+        submit_response = client.post(
+            "https://queue.fal.run/fal-ai/gpt-image-1-mini",
+            headers=headers,
+            json=payload
+        )
+        submit_response.raise_for_status()
+        submit_data = submit_response.json()
+        
+        request_id = submit_data.get("request_id")
+        status_url = submit_data.get("status_url") or f"https://queue.fal.run/fal-ai/gpt-image-1-mini/requests/{request_id}/status"
+        
+        print(f"[AI Image] Request submitted, ID: {request_id}")
         
         # Poll with 1 second interval (instead of default ~250ms)
         max_attempts = 120  # Max 2 minutes
         result = None
         
-        with httpx.Client(timeout=30) as client:
-            for attempt in range(max_attempts):
-                time.sleep(1)  # Wait 1 second between polls
-                
-                status_response = client.get(status_url, headers=headers)
-                status_data = status_response.json()
-                status = status_data.get("status", "UNKNOWN")
-                
-                print(f"[AI Image] Poll #{attempt + 1}: {status}")
-                
-                if status == "COMPLETED":
-                    # Fetch the result
-                    result_url = f"https://queue.fal.run/fal-ai/gpt-image-1-mini/requests/{request_id}"
-                    result_response = client.get(result_url, headers=headers)
-                    result = result_response.json()
-                    break
-                elif status in ("FAILED", "CANCELLED"):
-                    print(f"[AI Image] Request failed with status: {status}")
-                    return None
+        for attempt in range(max_attempts):
+            time.sleep(1)  # Wait 1 second between polls
+            
+            status_response = client.get(status_url, headers=headers)
+            status_data = status_response.json()
+            status = status_data.get("status", "UNKNOWN")
+            
+            print(f"[AI Image] Poll #{attempt + 1}: {status}")
+            
+            if status == "COMPLETED":
+                # Fetch the result
+                result_url = f"https://queue.fal.run/fal-ai/gpt-image-1-mini/requests/{request_id}"
+                result_response = client.get(result_url, headers=headers)
+                result = result_response.json()
+                break
+            elif status in ("FAILED", "CANCELLED"):
+                print(f"[AI Image] Request failed with status: {status}")
+                return None
         
         if result and "images" in result and len(result["images"]) > 0:
             image_url = result["images"][0]["url"]
@@ -178,6 +217,9 @@ def _download_image(url: str) -> Optional[BytesIO]:
     """
     Download an image from a URL into memory.
     
+    The body is streamed straight into the returned buffer, so the image is
+    never held as both a joined ``response.content`` and a BytesIO copy.
+    
     Args:
         url: The URL to download from
         
@@ -185,45 +227,27 @@ def _download_image(url: str) -> Optional[BytesIO]:
         BytesIO object containing the image data, or None if download fails
     """
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        return BytesIO(response.content)
+        image_data = BytesIO()
+        with _get_http_client().stream(
+            "GET", url, timeout=30, follow_redirects=True
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                image_data.write(chunk)
+        image_data.seek(0)
+        return image_data
     except Exception as e:
         logger.error(f"Error downloading image from {url}: {e}")
         return None
 
 
-def _convert_to_webp(image_data: BytesIO) -> Optional[BytesIO]:
-    """
-    Convert image data to WebP format for optimal file size.
-    
-    Args:
-        image_data: BytesIO containing the original image
-        
-    Returns:
-        BytesIO containing the WebP image, or None if conversion fails
-    """
-    try:
-        from PIL import Image
-        
-        with Image.open(image_data) as img:
-            # Convert to RGBA to preserve transparency
-            if img.mode != "RGBA":
-                img = img.convert("RGBA")
-            
-            output = BytesIO()
-            img.save(output, format="WEBP", quality=85)
-            output.seek(0)
-            return output
-    except Exception as e:
-        logger.error(f"Error converting image to WebP: {e}")
-        return None
-
-
 def _upload_to_cloudinary(image_data: BytesIO, food_name: str) -> Optional[str]:
     """
     Upload an image to Cloudinary.
     
+    Cloudinary converts the upload to WebP server-side (``format="webp"``),
+    so the worker never has to decode and re-encode the PNG itself.
+    
     Args:
         image_data: BytesIO containing the image data
         food_name: The food name (used to generate public_id)
@@ -236,10 +260,8 @@ def _upload_to_cloudinary(image_data: BytesIO, food_name: str) -> Optional[str]:
         return None
     
     # Create a safe public_id from the food name
-    public_id = food_name.lower()
-    for char in [" ", ",", "/", "(", ")", "'", '"', "&"]:
-        public_id = public_id.replace(char, "_")
-    public_id = "_".join(filter(None, public_id.split("_")))  # Remove consecutive underscores
+    public_id = food_name.lower().translate(_PUBLIC_ID_TABLE)
+    public_id = _UNDERSCORE_RUNS.sub("_", public_id).strip("_")  # Remove consecutive underscores
     
     try:
         response = cloudinary.uploader.upload(
@@ -247,7 +269,8 @@ def _upload_to_cloudinary(image_data: BytesIO, food_name: str) -> Optional[str]:
             public_id=public_id,
             folder="food_images/proposals",
             overwrite=True,
-            resource_type="image"
+            resource_type="image",
+            format="webp",
         )
         url = response.get("secure_url")
         logger.info(f"Successfully uploaded image to Cloudinary: {url}")
@@ -265,9 +288,8 @@ def generate_food_image(food_name: str) -> Optional[str]:
     It handles the full pipeline:
     1. Generate image using Fal AI
     2. Download the generated image
-    3. Convert to WebP format
-    4. Upload to Cloudinary
-    5. Return the Cloudinary URL
+    3. Upload to Cloudinary, which stores it as WebP
+    4. Return the Cloudinary URL
     
     Args:
         food_name: The name of the food to generate an image for
@@ -298,16 +320,8 @@ def generate_food_image(food_name: str) -> Optional[str]:
         logger.warning(f"Failed to download generated image for: {food_name}")
         return None
     
-    # Step 3: Convert to WebP for optimal size
-    webp_data = _convert_to_webp(image_data)
-    if not webp_data:
-        # Fall back to original PNG if WebP conversion fails
-        logger.warning(f"WebP conversion failed for {food_name}, using original PNG")
-        image_data.seek(0)
-        webp_data = image_data
-    
-    # Step 4: Upload to Cloudinary
-    cloudinary_url = _upload_to_cloudinary(webp_data, food_name)
+    # Step 3: Upload to Cloudinary (converted to WebP on Cloudinary's side)
+    cloudinary_url = _upload_to_cloudinary(image_data, food_name)
     if not cloudinary_url:
         logger.warning(f"Failed to upload image to Cloudinary for: {food_name}")
         return None
@@ -330,6 +344,50 @@ def is_image_generation_enabled() -> bool:
     return bool(fal_key and cloud_name and api_key and api_secret)
 
 
+def save_generated_image(food_entry_id: int, image_url: str) -> bool:
+    """
+    Store a generated image URL on a FoodEntry.
+    
+    Only the imageUrl column is written, and only if no image was set in the
+    meantime. Rows locked by a concurrent moderator edit are skipped rather
+    than waited on (QuerySet.update ignores select_for_update, so the row is
+    locked with a SELECT first).
+    
+    Args:
+        food_entry_id: The ID of the FoodEntry to update
+        image_url: The Cloudinary URL of the generated image
+        
+    Returns:
+        True if the FoodEntry was updated, False otherwise
+    """
+    from django.db import transaction
+    # Import here to avoid circular imports
+    from foods.models import FoodEntry
+    
+    with transaction.atomic():
+        locked_ids = list(
+            FoodEntry.objects.select_for_update(skip_locked=True)
+            .filter(id=food_entry_id, imageUrl="")
+            .values_list("id", flat=True)
+        )
+        updated = (
+            FoodEntry.objects.filter(id__in=locked_ids).update(imageUrl=image_url)
+            if locked_ids
+            else 0
+        )
+    
+    if updated:
+        print(f"[AI Image Background] SUCCESS - Updated FoodEntry {food_entry_id}")
+        logger.info(f"[Background] Successfully updated FoodEntry {food_entry_id} with image: {image_url}")
+    else:
+        print(f"[AI Image Background] WARNING - FoodEntry {food_entry_id} not updated")
+        logger.warning(
+            f"[Background] FoodEntry {food_entry_id} not found, already has an image, "
+            "or is being edited; skipping image update"
+        )
+    return bool(updated)
+
+
 def _background_image_generation_task(food_entry_id: int, food_name: str):
     """
     Background task to generate and update food image.
@@ -353,21 +411,11 @@ def _background_image_generation_task(food_entry_id: int, food_name: str):
         
         if image_url:
             print(f"[AI Image Background] Generated URL: {image_url}")
-            # Import here to avoid circular imports
-            from foods.models import FoodEntry
             
             # Close any stale connections before querying
             connection.close()
             
-            # Update the FoodEntry with the generated image URL
-            updated = FoodEntry.objects.filter(id=food_entry_id).update(imageUrl=image_url)
-            
-            if updated:
-                print(f"[AI Image Background] SUCCESS - Updated FoodEntry {food_entry_id}")
-                logger.info(f"[Background] Successfully updated FoodEntry {food_entry_id} with image: {image_url}")
-            else:
-                print(f"[AI Image Background] WARNING - FoodEntry {food_entry_id} not found")
-                logger.warning(f"[Background] FoodEntry {food_entry_id} not found for image update")
+            save_generated_image(food_entry_id, image_url)
         else:
             print(f"[AI Image Background] FAILED - No image generated for {food_name}")
             logger.warning(f"[Background] Failed to generate image for FoodEntry {food_entry_id}: {food_name}")
@@ -378,15 +426,37 @@ def _background_image_generation_task(food_entry_id: int, food_name: str):
     finally:
         # Clean up database connection
         connection.close()
+        with _inflight_lock:
+            _inflight_ids.discard(food_entry_id)
         print(f"[AI Image Background] Task completed for FoodEntry {food_entry_id}")
 
 
+def _use_task_queue() -> bool:
+    """
+    Whether image generation should be dispatched to the Celery worker.
+    Requires CELERY_BROKER_URL to be set and celery to be installed.
+    """
+    if not getattr(settings, "CELERY_BROKER_URL", ""):
+        return False
+    
+    from project import celery_app
+    
+    if celery_app is None:
+        logger.error("CELERY_BROKER_URL is set but celery is not installed. Run: pip install celery[redis]")
+        return False
+    return True
+
+
 def generate_food_image_async(food_entry_id: int, food_name: str) -> None:
     """
     Generate an AI image for a food item in the background (non-blocking).
     
-    This spawns a background thread to handle the image generation,
-    allowing the API to return immediately to the user.
+    When a Celery broker is configured (CELERY_BROKER_URL), the work is queued
+    as ``foods.tasks.generate_food_image_task`` on the image_generation queue
+    so it survives web process restarts, is rate-limited by the (single)
+    worker consuming that queue and retried on failure.
+    Otherwise a background thread is spawned. Either way the API returns
+    immediately to the user.
     
     Args:
         food_entry_id: The ID of the FoodEntry to update with the generated image
@@ -408,6 +478,23 @@ def generate_food_image_async(food_entry_id: int, food_name: str) -> None:
         logger.warning("Empty food name provided for async image generation")
         return
     
+    if _use_task_queue():
+        from foods.tasks import generate_food_image_task
+        
+        generate_food_image_task.delay(food_entry_id, food_name.strip())
+        print(f"[AI Image] Queued image generation task for: {food_name}")
+        logger.info(f"Queued image generation task: FoodEntry {food_entry_id}, {food_name}")
+        return
+    
+    # Coalesce duplicate requests (e.g. a double-clicked approval) so the same
+    # entry isn't generated (and paid for) twice
+    with _inflight_lock:
+        if food_entry_id in _inflight_ids:
+            print(f"[AI Image] Generation already in progress for FoodEntry {food_entry_id}")
+            logger.info(f"Image generation already in progress for FoodEntry {food_entry_id}, skipping")
+            return
+        _inflight_ids.add(food_entry_id)
+    
     print(f"[AI Image] Spawning background thread for: {food_name}")
     logger.info(f"Spawning background thread for image generation: FoodEntry {food_entry_id}, {food_name}")
     
@@ -417,6 +504,12 @@ def generate_food_image_async(food_entry_id: int, food_name: str) -> None:
         args=(food_entry_id, food_name.strip()),
         daemon=True  # Daemon thread won't prevent process exit
     )
-    thread.start()
+    try:
+        thread.start()
+    except Exception:
+        # The thread never ran, so it won't release the entry; do it here or
+        # every later request for this entry would be skipped as in flight
+        with _inflight_lock:
+            _inflight_ids.discard(food_entry_id)
+        raise
     print(f"[AI Image] Background thread started for: {food_name}")
-
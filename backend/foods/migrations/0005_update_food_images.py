@@ -1,6 +1,8 @@
 # Generated migration to update food image URLs
 
-from django.db import migrations
+from collections import defaultdict
+
+from django.db import migrations, transaction
 import json
 import os
 
@@ -22,38 +24,49 @@ def update_food_images(apps, schema_editor):
     
     FoodEntry = apps.get_model("foods", "FoodEntry")
     
-    updated_count = 0
+    # name -> new image URL; later items win, as with sequential per-item saves
+    name_to_url = {
+        item["name"]: item["imageUrl"] for item in data if item.get("imageUrl")
+    }
+    
+    # Fetch only the entries we need, in one query
+    entries_by_name = defaultdict(list)
+    for food_entry in FoodEntry.objects.filter(name__in=list(name_to_url)).only("id", "name"):
+        entries_by_name[food_entry.name].append(food_entry)
+    
+    to_update = []
     not_found_count = 0
     
-    for item in data:
-        food_name = item["name"]
-        new_image_url = item.get("imageUrl")
-        
-        if not new_image_url:
-            continue
-            
-        try:
-            # Find the food entry by name and update its imageUrl
-            food_entry = FoodEntry.objects.get(name=food_name)
-            food_entry.imageUrl = new_image_url
-            food_entry.save()
-            updated_count += 1
-        except FoodEntry.DoesNotExist:
+    for food_name, new_image_url in name_to_url.items():
+        entries = entries_by_name.get(food_name)
+        if not entries:
             print(f"Warning: Food entry '{food_name}' not found in database")
             not_found_count += 1
-        except Exception as e:
-            print(f"Error updating {food_name}: {e}")
+            continue
+        if len(entries) > 1:
+            # Ambiguous name; leave these entries untouched
+            print(f"Error updating {food_name}: found {len(entries)} food entries with this name")
+            continue
+        
+        food_entry = entries[0]
+        food_entry.imageUrl = new_image_url
+        to_update.append(food_entry)
+    
+    # One batched UPDATE instead of a save() per row
+    with transaction.atomic():
+        FoodEntry.objects.bulk_update(to_update, ["imageUrl"], batch_size=1000)
     
-    print(f"Food image update completed. Updated: {updated_count}, Not found: {not_found_count}")
+    print(f"Food image update completed. Updated: {len(to_update)}, Not found: {not_found_count}")
 
 
 def backwards(apps, schema_editor):
     """
-    Reverse operation - set all imageUrl fields to None
+    Reverse operation - clear all imageUrl fields
     """
     FoodEntry = apps.get_model("foods", "FoodEntry")
-    FoodEntry.objects.all().update(imageUrl=None)
-    print("All food image URLs have been reset to None")
+    # imageUrl is NOT NULL, so clear it to "" and only touch rows that have one
+    count = FoodEntry.objects.exclude(imageUrl="").update(imageUrl="")
+    print(f"Cleared {count} food image URLs")
 
 
 class Migration(migrations.Migration):
@@ -1,36 +1,91 @@
+from django.conf import settings
 from django.db import migrations
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import httpx
 import json
 import os
+import sqlite3
 
-MAX_WORKERS = 32
-CACHE_FILE = "broken_link_cache.json"
+MAX_CONNECTIONS = 128
+CACHE_CHUNK = 500
 
 
-def load_cache():
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+def cache_paths():
+    """
+    Return (cache, legacy) file paths, both under settings.BROKEN_LINK_CACHE_DIR.
 
+    Earlier runs kept the whole cache in one JSON blob; its entries are folded
+    into the SQLite cache without overriding newer results.
+    """
+    cache_dir = settings.BROKEN_LINK_CACHE_DIR
+    return (
+        cache_dir / "broken_link_cache.sqlite3",
+        cache_dir / "broken_link_cache.json",
+    )
 
-def save_cache(cache):
-    tmp = CACHE_FILE + ".tmp"
-    with open(tmp, "w") as f:
-        json.dump(cache, f, indent=2)
-    os.replace(tmp, CACHE_FILE)
 
+def open_cache():
+    """Open the url -> broken cache, a keyed SQLite table updated in place."""
+    cache_file, legacy_file = cache_paths()
+    conn = sqlite3.connect(cache_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache (url TEXT PRIMARY KEY, broken INTEGER NOT NULL)"
+    )
+    if os.path.exists(legacy_file):
+        try:
+            with open(legacy_file, "r") as f:
+                legacy = json.load(f)
+        except Exception:
+            legacy = {}
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache VALUES (?, ?)",
+                ((url, int(bool(broken))) for url, broken in legacy.items()),
+            )
+    return conn
+
+
+def load_cache(conn, urls):
+    cache = {}
+    for i in range(0, len(urls), CACHE_CHUNK):
+        chunk = urls[i:i + CACHE_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT url, broken FROM cache WHERE url IN ({placeholders})", chunk
+        )
+        cache.update((url, bool(broken)) for url, broken in rows)
+    return cache
+
+
+def save_cache(conn, results):
+    items = [(url, int(broken)) for url, broken in results.items()]
+    for i in range(0, len(items), CACHE_CHUNK):
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?)", items[i:i + CACHE_CHUNK]
+            )
+
+
+async def check_url(client, sem, url):
+    async with sem:
+        try:
+            r = await client.head(url, follow_redirects=True)
+            return (url, r.status_code == 200, None)
+        except Exception as e:
+            return (url, False, e)
 
-def check_url(url):
-    try:
-        r = requests.head(url, timeout=5, allow_redirects=True)
-        return (url, r.status_code == 200, None)
-    except Exception as e:
-        return (url, False, e)
+
+async def check_urls(urls):
+    # One pooled client keeps connections alive across URLs on the same host,
+    # instead of a fresh TCP/TLS handshake per request
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS // 2
+    )
+    sem = asyncio.Semaphore(MAX_CONNECTIONS)
+    async with httpx.AsyncClient(timeout=5, limits=limits) as client:
+        return await asyncio.gather(*(check_url(client, sem, url) for url in urls))
 
 
 def remove_broken_links(apps, schema_editor):
@@ -44,21 +99,23 @@ def remove_broken_links(apps, schema_editor):
 
     foods = list(qs)
     print(f"\nChecking {len(foods)} external links...")
+    if not foods:
+        return
 
-    # Load cache: url -> True/False
-    cache = load_cache()
+    # Load cache: url -> True/False, only for the URLs we are about to check
+    cache_conn = open_cache()
+    cache = load_cache(cache_conn, list({f.imageUrl for f in foods}))
 
     # Filter URLs that need querying
     to_query = [f for f in foods if f.imageUrl not in cache]
 
     print(f"{len(to_query)} URLs not in cache; querying them...")
 
-    # Parallel requests
+    # Concurrent requests, one per distinct URL
     new_results = {}
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
-        futures = {pool.submit(check_url, f.imageUrl): f for f in to_query}
-        for fut in as_completed(futures):
-            url, ok, _ = fut.result()
+    if to_query:
+        urls = list(dict.fromkeys(f.imageUrl for f in to_query))
+        for url, ok, _ in asyncio.run(check_urls(urls)):
             # ok=True means NOT broken
             broken = not ok
             new_results[url] = broken
@@ -66,8 +123,9 @@ def remove_broken_links(apps, schema_editor):
     # Merge new results into the cache
     cache.update(new_results)
 
-    # Persist cache
-    save_cache(cache)
+    # Persist only the new results
+    save_cache(cache_conn, new_results)
+    cache_conn.close()
 
     # Apply DB changes sequentially
     removed_count = 0
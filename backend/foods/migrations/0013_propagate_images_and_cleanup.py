@@ -4,21 +4,24 @@ from collections import defaultdict
 def propagate_images_and_cleanup(apps, schema_editor):
     FoodEntry = apps.get_model('foods', 'FoodEntry')
     
-    # Fetch all food items
-    all_foods = list(FoodEntry.objects.all())
+    # Stream all food items, loading only the columns used below
+    all_foods = (
+        FoodEntry.objects.only('id', 'name', 'imageUrl', 'micronutrients')
+        .iterator(chunk_size=2000)
+    )
     
-    # Group by base name
+    # Group by base name, normalising each name once up front
     food_groups = defaultdict(list)
     for food in all_foods:
-        name = food.name.strip()
-        if ',' in name:
-            base_name = name.split(',')[0].strip()
-        else:
-            base_name = name
-        food_groups[base_name.lower()].append(food)
+        food._norm_name = food.name.lower()
+        base_name = food._norm_name.strip().split(',', 1)[0].strip()
+        food_groups[base_name].append(food)
         
-    items_to_update = []
+    # source image url -> ids of the items that should receive it
+    ids_by_image = defaultdict(list)
     ids_to_delete = set()
+    # target_id -> ids of the old items whose logs should point at it
+    repoint_map = defaultdict(list)
     
     for base_name, items in food_groups.items():
         source_image = None
@@ -27,7 +30,7 @@ def propagate_images_and_cleanup(apps, schema_editor):
         # 1. Find a source image
         # Priority 1: Exact match with base name AND has image
         for item in items:
-            if item.name.lower() == base_name and item.imageUrl:
+            if item._norm_name == base_name and item.imageUrl:
                 source_image = item.imageUrl
                 source_item = item
                 break
@@ -55,52 +58,42 @@ def propagate_images_and_cleanup(apps, schema_editor):
         # 2. Identify targets (items without image) and update them
         for item in items:
             if not item.imageUrl and item.id != source_item.id:
-                item.imageUrl = source_image
-                items_to_update.append(item)
+                ids_by_image[source_image].append(item.id)
                 
         # 3. Identify Old items to delete
         # Logic: If the group has at least one "New" item (with micros), 
         # we can safely delete all "Old" items (no micros) in this group,
         # including the source item if it was Old.
         
-        has_new_item = any(item.micronutrients and item.micronutrients != {} for item in items)
+        # The first "New" item doubles as the re-pointing target for the group
+        target_item = next(
+            (item for item in items if item.micronutrients and item.micronutrients != {}),
+            None,
+        )
         
-        if has_new_item:
+        if target_item:
             for item in items:
                 if item.micronutrients == {} or item.micronutrients is None:
                     ids_to_delete.add(item.id)
+                    repoint_map[target_item.id].append(item.id)
 
-    # Bulk update
-    if items_to_update:
-        FoodEntry.objects.bulk_update(items_to_update, ['imageUrl'])
+    # One UPDATE ... WHERE id IN (...) per source image, rather than a
+    # bulk_update CASE expression with a branch per row
+    for image_url, ids in ids_by_image.items():
+        step = schema_editor.connection.ops.bulk_batch_size(['id'], ids)
+        for i in range(0, len(ids), step):
+            FoodEntry.objects.filter(id__in=ids[i:i + step]).update(imageUrl=image_url)
         
     # Handle deletions with re-pointing
     if ids_to_delete:
         FoodLogEntry = apps.get_model('meal_planner', 'FoodLogEntry')
         
-        # We need to map old_id -> new_id for re-pointing
-        # Re-iterate groups to find a suitable replacement for each old item
-        for base_name, items in food_groups.items():
-            # Find a "New" item (target) in this group
-            target_item = None
-            for item in items:
-                if item.micronutrients and item.micronutrients != {}:
-                    target_item = item
-                    break
-            
-            if not target_item:
-                continue
-                
-            # Find "Old" items in this group that are marked for deletion
-            for item in items:
-                if item.id in ids_to_delete:
-                    # Re-point any logs pointing to this old item
-                    FoodLogEntry.objects.filter(food_id=item.id).update(food=target_item)
+        # One UPDATE per target rather than one per deleted item
+        for target_id, old_ids in repoint_map.items():
+            FoodLogEntry.objects.filter(food_id__in=old_ids).update(food_id=target_id)
                     
         # Now safe to delete (orphaned items)
-        # Note: If an item in ids_to_delete didn't have a target found above, 
-        # it might still fail if it has logs. But our logic ensures we only delete 
-        # if has_new_item is True, so target_item should be found.
+        # Every id in ids_to_delete was recorded against a target above.
         FoodEntry.objects.filter(id__in=ids_to_delete).delete()
 
 class Migration(migrations.Migration):
@@ -111,5 +104,7 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.RunPython(propagate_images_and_cleanup),
+        # All writes run in one transaction; RunPython forces one even on
+        # backends without transactional DDL (MySQL)
+        migrations.RunPython(propagate_images_and_cleanup, atomic=True),
     ]
@@ -1,5 +1,7 @@
+from bisect import bisect_left
+
 from django.db import migrations
-from django.db.models import Q
+from django.db.models import Count, Q
 
 def cleanup_empty_micros(apps, schema_editor):
     FoodEntry = apps.get_model('foods', 'FoodEntry')
@@ -12,9 +14,40 @@ def cleanup_empty_micros(apps, schema_editor):
     
     print(f"Found {empty_micros_items.count()} items with empty micronutrients to clean up.")
     
-    for item in empty_micros_items:
+    # Fetch every "New" item (has micronutrients) once, sorted by lowercased
+    # name so the istartswith lookup below becomes a bisect over a prefix range
+    candidates = sorted(
+        (name.lower(), pk, name)
+        for pk, name in FoodEntry.objects.filter(micronutrients__isnull=False)
+        .exclude(micronutrients__exact={})
+        .values_list('id', 'name')
+    )
+    candidate_names = [c[0] for c in candidates]
+    
+    def find_replacement(base_name, exclude_id):
+        """Lowest-id "New" item whose name starts with base_name, like .first()"""
+        prefix = base_name.lower()
+        best = None
+        for lowered, pk, name in candidates[bisect_left(candidate_names, prefix):]:
+            if not lowered.startswith(prefix):
+                break
+            if pk != exclude_id and (best is None or pk < best[0]):
+                best = (pk, name)
+        return best
+    
+    ids_to_delete = []
+    
+    # Log counts for every food in one GROUP BY rather than a COUNT per item
+    log_counts = dict(
+        FoodLogEntry.objects.order_by()
+        .values('food_id')
+        .annotate(c=Count('id'))
+        .values_list('food_id', 'c')
+    )
+    
+    for item in empty_micros_items.only('id', 'name').iterator(chunk_size=2000):
         # Check for logs
-        log_count = FoodLogEntry.objects.filter(food_id=item.id).count()
+        log_count = log_counts.get(item.id, 0)
         
         if log_count > 0:
             # Try to find a replacement
@@ -26,31 +59,37 @@ def cleanup_empty_micros(apps, schema_editor):
                 
             # Find a "New" item with the same base name (case insensitive)
             # and has micronutrients
-            replacements = FoodEntry.objects.filter(
-                name__istartswith=base_name,
-                micronutrients__isnull=False
-            ).exclude(micronutrients__exact={}).exclude(id=item.id)
-            
-            replacement = replacements.first()
+            replacement = find_replacement(base_name, item.id)
             
             if replacement:
-                print(f"Re-pointing {log_count} logs from '{item.name}' to '{replacement.name}'")
-                FoodLogEntry.objects.filter(food_id=item.id).update(food=replacement)
-                item.delete()
+                replacement_id, replacement_name = replacement
+                print(f"Re-pointing {log_count} logs from '{item.name}' to '{replacement_name}'")
+                FoodLogEntry.objects.filter(food_id=item.id).update(food_id=replacement_id)
+                ids_to_delete.append(item.id)
             else:
                 print(f"SKIPPING '{item.name}' (ID: {item.id}) - Has {log_count} logs but no replacement found.")
         else:
             # No logs, safe to delete
             # print(f"Deleting '{item.name}' (ID: {item.id})")
-            item.delete()
+            ids_to_delete.append(item.id)
+    
+    # Replacements never have empty micronutrients, so deferring the deletes
+    # does not change which items the lookups above can see
+    for i in range(0, len(ids_to_delete), 1000):
+        FoodEntry.objects.filter(id__in=ids_to_delete[i:i + 1000]).delete()
 
     # Explicitly delete "Organic Tomato Meatball Soup"
-    soup_items = FoodEntry.objects.filter(name__iexact="Organic Tomato Meatball Soup")
-    for item in soup_items:
-        print(f"Explicitly deleting '{item.name}' (ID: {item.id})")
-        # Nullify logs pointing to this item to allow deletion
-        FoodLogEntry.objects.filter(food_id=item.id).update(food=None)
-        item.delete()
+    soup_items = list(
+        FoodEntry.objects.filter(name__iexact="Organic Tomato Meatball Soup")
+        .values_list('id', 'name')
+    )
+    if soup_items:
+        soup_ids = [item_id for item_id, _ in soup_items]
+        for item_id, name in soup_items:
+            print(f"Explicitly deleting '{name}' (ID: {item_id})")
+        # Nullify logs pointing to these items to allow deletion
+        FoodLogEntry.objects.filter(food_id__in=soup_ids).update(food=None)
+        FoodEntry.objects.filter(id__in=soup_ids).delete()
 
 class Migration(migrations.Migration):
 
@@ -59,5 +98,7 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.RunPython(cleanup_empty_micros),
+        # All writes run in one transaction; RunPython forces one even on
+        # backends without transactional DDL (MySQL)
+        migrations.RunPython(cleanup_empty_micros, atomic=True),
     ]
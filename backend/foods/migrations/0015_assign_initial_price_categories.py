@@ -1,7 +1,69 @@
+import re
+
 from django.db import migrations
 from foods.constants import PriceCategory
 
 
+# Premium categories
+PREMIUM_CATEGORIES = frozenset({
+    'liquor and cocktails', 'nuts and seeds', 'cheese',
+    'salad dressings and vegetable oils', 'ice cream and frozen dairy desserts',
+    'cakes and pies', 'sport and energy drinks',
+    'nutritional beverages', 'protein and nutritional powders',
+    'shellfish', 'beef, excludes ground', 'jams, syrups, toppings',
+    'candy containing chocolate',
+})
+
+# Cheap categories
+CHEAP_CATEGORIES = frozenset({
+    'tap water', 'bottled water', 'baby water',
+    'lettuce and lettuce salads', 'rice', 'white potatoes, baked or boiled',
+    'formula, prepared from powder', 'beans, peas, legumes',
+    'pasta mixed dishes, excludes macaroni and cheese',
+})
+
+# Mid categories
+MID_CATEGORIES = frozenset({
+    'chicken, whole pieces', 'fish', 'eggs and omelets',
+    'yeast breads', 'pizza', 'burgers',
+    'cookies and brownies',
+    'rolls and buns', 'cold cuts and cured meats',
+    'deli and cured meat sandwiches', 'fruit drinks', 'soft drinks',
+    'other starchy vegetables', 'crackers, excludes saltines',
+    'turkey, other poultry', 'other vegetables and combinations',
+    'other dark green vegetables', 'other fruits and fruit salads',
+    'coffee', 'tea',
+})
+
+PREMIUM_KEYWORDS = (
+    'liquor', 'cocktail', 'wine', 'beer', 'whiskey', 'vodka', 'rum',
+    'tequila', 'brandy', 'scotch', 'liqueur', 'champagne',
+    'macadamia', 'pistachio', 'almond', 'walnut', 'pecan', 'cashew',
+    'hazelnut', 'pine nut', 'caviar', 'truffle', 'foie gras',
+    'lobster', 'crab', 'shrimp', 'scallop', 'oyster',
+    'salmon', 'tuna', 'sashimi', 'brie', 'gouda', 'cheddar',
+    'parmesan', 'mozzarella', 'feta', 'goat cheese',
+    'espresso', 'cappuccino', 'latte', 'mocha',  # Specialty coffee drinks (premium)
+    'gelato', 'sorbet', 'dark chocolate', 'cocoa',
+    'supplement', 'protein powder', 'boost', 'ensure',
+    'monster', 'red bull', 'rockstar',
+    'olive oil', 'avocado oil', 'coconut oil',
+    'croissant', 'pastry', 'duck',
+)
+
+CHEAP_KEYWORDS = (
+    'water', 'tap', 'rice', 'pasta', 'bread', 'flour',
+    'potato', 'onion', 'carrot', 'cabbage', 'lettuce',
+    'banana', 'apple', 'orange', 'bean', 'lentil', 'chickpea',
+    'formula', 'baby food',
+)
+
+# Each keyword tuple compiles to a single alternation, so a name is scanned once
+# instead of once per keyword
+PREMIUM_KEYWORDS_RE = re.compile('|'.join(map(re.escape, PREMIUM_KEYWORDS)))
+CHEAP_KEYWORDS_RE = re.compile('|'.join(map(re.escape, CHEAP_KEYWORDS)))
+
+
 def assign_price_categories(apps, schema_editor):
     """
     Assign initial price categories to all food items based on comprehensive analysis.
@@ -18,6 +80,7 @@ def assign_price_categories(apps, schema_editor):
     - ₺ ₺₺ (Premium): 818 items (23.5%)
     """
     FoodEntry = apps.get_model('foods', 'FoodEntry')
+    connection = schema_editor.connection
     
     # Price category mapping based on comprehensive analysis
     # Format: {food_id: price_category}
@@ -30,88 +93,27 @@ def assign_price_categories(apps, schema_editor):
     # For now, we'll use the analysis logic directly in the migration
     # to avoid embedding 3482 items in the migration file
     
-    def analyze_food_pricing(food):
-        """Replicate the analysis logic"""
-        name = food.name.lower()
-        category = food.category.lower()
-        nutrition_score = food.nutritionScore
-        
-        # Premium categories
-        premium_categories = {
-            'liquor and cocktails', 'nuts and seeds', 'cheese',
-            'salad dressings and vegetable oils', 'ice cream and frozen dairy desserts',
-            'cakes and pies', 'sport and energy drinks',
-            'nutritional beverages', 'protein and nutritional powders',
-            'shellfish', 'beef, excludes ground', 'jams, syrups, toppings',
-            'candy containing chocolate',
-        }
-        
-        # Cheap categories
-        cheap_categories = {
-            'tap water', 'bottled water', 'baby water',
-            'lettuce and lettuce salads', 'rice', 'white potatoes, baked or boiled',
-            'formula, prepared from powder', 'beans, peas, legumes',
-            'pasta mixed dishes, excludes macaroni and cheese',
-        }
-        
-        # Mid categories
-        mid_categories = {
-            'chicken, whole pieces', 'fish', 'eggs and omelets',
-            'yeast breads', 'pizza', 'burgers',
-            'cookies and brownies',
-            'rolls and buns', 'cold cuts and cured meats',
-            'deli and cured meat sandwiches', 'fruit drinks', 'soft drinks',
-            'other starchy vegetables', 'crackers, excludes saltines',
-            'turkey, other poultry', 'other vegetables and combinations',
-            'other dark green vegetables', 'other fruits and fruit salads',
-            'coffee', 'tea',
-        }
+    def analyze_food_pricing(name, category, nutrition_score):
+        """Replicate the analysis logic (name and category are lowercased)"""
         
         # Category-based assignment
         price_category = None
         
-        if category in premium_categories:
+        if category in PREMIUM_CATEGORIES:
             price_category = PriceCategory.PREMIUM
-        elif category in cheap_categories:
+        elif category in CHEAP_CATEGORIES:
             price_category = PriceCategory.CHEAP
-        elif category in mid_categories:
+        elif category in MID_CATEGORIES:
             price_category = PriceCategory.MID
         
         # Keyword analysis
         if price_category is None or price_category == PriceCategory.MID:
-            premium_keywords = [
-                'liquor', 'cocktail', 'wine', 'beer', 'whiskey', 'vodka', 'rum',
-                'tequila', 'brandy', 'scotch', 'liqueur', 'champagne',
-                'macadamia', 'pistachio', 'almond', 'walnut', 'pecan', 'cashew',
-                'hazelnut', 'pine nut', 'caviar', 'truffle', 'foie gras',
-                'lobster', 'crab', 'shrimp', 'scallop', 'oyster',
-                'salmon', 'tuna', 'sashimi', 'brie', 'gouda', 'cheddar',
-                'parmesan', 'mozzarella', 'feta', 'goat cheese',
-                'espresso', 'cappuccino', 'latte', 'mocha',  # Specialty coffee drinks (premium)
-                'gelato', 'sorbet', 'dark chocolate', 'cocoa',
-                'supplement', 'protein powder', 'boost', 'ensure',
-                'monster', 'red bull', 'rockstar',
-                'olive oil', 'avocado oil', 'coconut oil',
-                'croissant', 'pastry', 'duck',
-            ]
-            
-            for keyword in premium_keywords:
-                if keyword in name:
-                    price_category = PriceCategory.PREMIUM
-                    break
+            if PREMIUM_KEYWORDS_RE.search(name):
+                price_category = PriceCategory.PREMIUM
         
         if price_category is None:
-            cheap_keywords = [
-                'water', 'tap', 'rice', 'pasta', 'bread', 'flour',
-                'potato', 'onion', 'carrot', 'cabbage', 'lettuce',
-                'banana', 'apple', 'orange', 'bean', 'lentil', 'chickpea',
-                'formula', 'baby food',
-            ]
-            
-            for keyword in cheap_keywords:
-                if keyword in name and 'oil' not in name:
-                    price_category = PriceCategory.CHEAP
-                    break
+            if 'oil' not in name and CHEAP_KEYWORDS_RE.search(name):
+                price_category = PriceCategory.CHEAP
         
         # Default to MID
         if price_category is None:
@@ -145,37 +147,44 @@ def assign_price_categories(apps, schema_editor):
     mid_count = 0
     premium_count = 0
     
-    # Process in batches to avoid memory issues
+    # Stream the rows in chunks, fetching only the columns the classifier
+    # reads, as plain tuples rather than model instances.
     batch_size = 1000
-    foods_to_update_list = list(foods_to_update)
+    rows = (
+        foods_to_update.filter(category_overridden_by__isnull=True)
+        .values_list('id', 'name', 'category', 'nutritionScore')
+        .iterator(chunk_size=batch_size)
+    )
+    # Only three possible values, so group ids by category and issue one
+    # UPDATE ... WHERE id IN (...) per category instead of a CASE per row
+    ids_by_category = {}
     
-    for i in range(0, len(foods_to_update_list), batch_size):
-        batch = foods_to_update_list[i:i + batch_size]
-        foods_to_save = []
+    for food_id, name, category, nutrition_score in rows:
+        price_category = analyze_food_pricing(
+            name.lower(), category.lower(), nutrition_score
+        )
+        ids_by_category.setdefault(price_category, []).append(food_id)
         
-        for food in batch:
-            # Skip if already has category or manual override
-            if food.price_category is not None or food.category_overridden_by is not None:
-                continue
-            
-            price_category = analyze_food_pricing(food)
-            food.price_category = price_category
-            foods_to_save.append(food)
-            
-            updated_count += 1
-            if price_category == PriceCategory.CHEAP:
-                cheap_count += 1
-            elif price_category == PriceCategory.MID:
-                mid_count += 1
-            else:
-                premium_count += 1
+        updated_count += 1
+        if price_category == PriceCategory.CHEAP:
+            cheap_count += 1
+        elif price_category == PriceCategory.MID:
+            mid_count += 1
+        else:
+            premium_count += 1
         
-        # Bulk update for better performance
-        if foods_to_save:
-            FoodEntry.objects.bulk_update(foods_to_save, ['price_category'], batch_size=500)
-        
-        processed = min(i + batch_size, len(foods_to_update_list))
-        print(f"  Processed {processed}/{len(foods_to_update_list)} items...")
+        if updated_count % batch_size == 0:
+            print(f"  Processed {updated_count}/{total} items...")
+    
+    # Write only once the cursor is exhausted: SQLite gives no isolation
+    # between an open chunked read and updates to the same table
+    for price_category, ids in ids_by_category.items():
+        # Respect the backend's parameter limit (SQLite) for the IN list
+        step = connection.ops.bulk_batch_size(['id'], ids)
+        for j in range(0, len(ids), step):
+            FoodEntry.objects.filter(id__in=ids[j:j + step]).update(
+                price_category=price_category
+            )
     
     print(f"\nPrice category assignment complete!")
     print(f"  Total updated: {updated_count}")
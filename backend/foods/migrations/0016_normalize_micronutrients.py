@@ -1,4 +1,48 @@
-from django.db import migrations, models
+import json
+import os
+
+from django.db import migrations, models, reset_queries
+from django.db.models.functions import Cast
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib decoder gives the same dicts
+    orjson = None
+
+# Decoder for the raw JSON text of FoodEntry.micronutrients
+loads = orjson.loads if orjson is not None else json.loads
+
+# Keys are stored as "Name (unit)"; maps the text after the last " (" to the unit
+UNIT_MAP = {'mg)': 'mg', 'µg)': 'ug', 'g)': 'g'}
+
+# Rows per INSERT statement; override for databases with tighter packet limits
+BULK_CREATE_BATCH_SIZE = int(os.environ.get('BULK_CREATE_BATCH_SIZE', '500'))
+
+
+def split_unit(key):
+    """Split a "Name (unit)" micronutrient key into (name, unit)."""
+    # unit is one of {'(mg)', '(g)', '(µg)'}
+    base, sep, suffix = key.rpartition(' (')
+    unit = UNIT_MAP.get(suffix) if sep else None
+    if unit is None:
+        # No recognised unit: keep the whole key and assume grams
+        return key.strip(), 'g'
+    return base.strip(), unit
+
+
+def pk_chunks(qs, chunk_size=2000):
+    """
+    Yield the rows of a values_list() queryset whose first field is the
+    primary key, in pk order, fetching each chunk with its own short query.
+    """
+    last_pk = None
+    while True:
+        page = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+        chunk = list(page.order_by("pk")[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            break
+        last_pk = chunk[-1][0]
 
 
 def forwards(apps, schema_editor):
@@ -6,70 +50,108 @@ def forwards(apps, schema_editor):
     Micronutrient = apps.get_model('foods', 'Micronutrient')
     FEM = apps.get_model('foods', 'FoodEntryMicronutrient')
 
-    micronutrient_cache = {}
-
-    # Preload any existing micronutrients (rare but safe)
-    for m in Micronutrient.objects.all():
-        micronutrient_cache[m.name] = m
-
+    # Foods with an empty dict produce no links; leave them in the database.
+    # Only the id and the JSON blob are needed; skip the other columns. The
+    # blob is fetched as text and decoded here, bypassing JSONField's decoder
+    foods = FoodEntry.objects.exclude(micronutrients__exact={}).values_list(
+        'id', Cast('micronutrients', models.TextField())
+    )
+
+    # Preload any existing micronutrients (rare but safe); only ids are needed
+    micronutrient_ids = dict(Micronutrient.objects.values_list('name', 'id'))
+
+    # Pass 1: collect the micronutrients that do not exist yet, in the order
+    # they are first seen, and create them in one batch instead of one
+    # INSERT per new name from inside the main loop
+    new_units = {}
+    for _, micronutrients in pk_chunks(foods):
+        for key in (loads(micronutrients) or {}):
+            name, unit = split_unit(key)
+            if name not in micronutrient_ids and name not in new_units:
+                new_units[name] = unit
+
+    if new_units:
+        # ignore_conflicts: a name created since the preload (e.g. by a
+        # partial earlier run) is skipped instead of failing on unique name
+        Micronutrient.objects.bulk_create(
+            [Micronutrient(name=name, unit=unit) for name, unit in new_units.items()],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        micronutrient_ids = dict(Micronutrient.objects.values_list('name', 'id'))
+
+    # Pass 2: build the links; every micronutrient is now a cache lookup
     batch = []
     BATCH_SIZE = 1000
+    flushes = 0
 
-    qs = FoodEntry.objects.all().iterator()
-
-    for fe in qs:
-        data = fe.micronutrients or {}
-        for name, value in data.items():
-            # unit is one of {'(mg)', '(g)', '(µg)'}
-            if name.endswith('(mg)'):
-                name = name[:-4].strip()
-                unit = 'mg'
-            elif name.endswith('(µg)'):
-                name = name[:-4].strip()
-                unit = 'ug'
-            else:
-                name = name.rstrip('(g)').strip()
-                unit = 'g'
-
+    for food_entry_id, micronutrients in pk_chunks(foods):
+        for key, value in (loads(micronutrients) or {}).items():
+            name, _ = split_unit(key)
             value = float(value)
 
-            # get or create in-memory
-            mn = micronutrient_cache.get(name)
-            if mn is None:
-                mn, created = Micronutrient.objects.get_or_create(name=name, unit=unit)
-                micronutrient_cache[name] = mn
-
             batch.append(
                 FEM(
-                    food_entry=fe,
-                    micronutrient=mn,
+                    food_entry_id=food_entry_id,
+                    micronutrient_id=micronutrient_ids[name],
                     value=value
                 )
             )
 
             if len(batch) >= BATCH_SIZE:
-                FEM.objects.bulk_create(batch)
+                FEM.objects.bulk_create(batch, batch_size=BULK_CREATE_BATCH_SIZE)
                 batch.clear()
 
+                # Keep memory flat over long runs: drop the DEBUG query log
+                # every few batches
+                flushes += 1
+                if flushes % 10 == 0:
+                    reset_queries()
+
     if batch:
-        FEM.objects.bulk_create(batch)
+        FEM.objects.bulk_create(batch, batch_size=BULK_CREATE_BATCH_SIZE)
 
 
 def backwards(apps, schema_editor):
     FoodEntry = apps.get_model('foods', 'FoodEntry')
     FEM = apps.get_model('foods', 'FoodEntryMicronutrient')
 
-    # Group micronutrients by food_entry to avoid multiple saves
-    from collections import defaultdict
-    food_entry_data = defaultdict(dict)
-
-    for link in FEM.objects.select_related("food_entry", "micronutrient").iterator():
-        food_entry_data[link.food_entry.id][link.micronutrient.name] = link.value
-
-    # Update each food entry once with all its micronutrients
-    for fe in FoodEntry.objects.all().iterator():
-        fe.micronutrients = food_entry_data.get(fe.id, {})
-        fe.save(update_fields=["micronutrients"])
+    # Foods without any links get an empty dict in one statement
+    FoodEntry.objects.exclude(
+        id__in=FEM.objects.values('food_entry_id')
+    ).update(micronutrients={})
+
+    # Stream the links grouped by food entry (in link order within a food) and
+    # emit each food's dict as soon as its group ends, so only one food's
+    # micronutrients plus the update buffer are held in memory
+    links = (
+        FEM.objects.order_by('food_entry_id', 'id')
+        .values_list('food_entry_id', 'micronutrient__name', 'value')
+        .iterator(chunk_size=5000)
+    )
+
+    to_update = []
+    current_id = None
+    current = {}
+
+    def flush_current():
+        to_update.append(FoodEntry(id=current_id, micronutrients=current))
+        if len(to_update) >= 500:
+            FoodEntry.objects.bulk_update(to_update, ['micronutrients'], batch_size=500)
+            to_update.clear()
+
+    for food_entry_id, name, value in links:
+        if food_entry_id != current_id:
+            if current_id is not None:
+                flush_current()
+            current_id = food_entry_id
+            current = {}
+        current[name] = value
+
+    if current_id is not None:
+        flush_current()
+    if to_update:
+        FoodEntry.objects.bulk_update(to_update, ['micronutrients'], batch_size=500)
 
 
 class Migration(migrations.Migration):
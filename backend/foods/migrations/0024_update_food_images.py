@@ -1,8 +1,37 @@
-from django.db import migrations
+from django.db import migrations, reset_queries
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
 
+# Same result as the chained .replace() calls in generate_food_images.py,
+# done in a single pass over the string
+SAFE_NAME_TABLE = str.maketrans({" ": "_", ",": None, "/": "_", "(": None, ")": None})
+
+
+@lru_cache(maxsize=8192)
+def safe_name_for(name):
+    """Mapping key for a food name; cached since many foods share a name."""
+    # Normalize name logic (must match analyze_food_images.py)
+    base_name = name.split(",", 1)[0].strip().lower()
+    # Safe filename logic (must match generate_food_images.py)
+    return base_name.translate(SAFE_NAME_TABLE)
+
+
+def pk_chunks(qs, chunk_size=2000):
+    """
+    Yield the rows of a values_list() queryset whose first field is the
+    primary key, in pk order, fetching each chunk with its own short query.
+    """
+    last_pk = None
+    while True:
+        page = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+        chunk = list(page.order_by("pk")[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            break
+        last_pk = chunk[-1][0]
+
 
 def update_images(apps, schema_editor):
     FoodEntry = apps.get_model("foods", "FoodEntry")
@@ -20,39 +49,45 @@ def update_images(apps, schema_editor):
 
     print(f"Loaded {len(mapping)} image mappings.")
 
-    # Fetch all foods to update their images from the mapping
-    foods = FoodEntry.objects.all()
+    # Walk all foods in pk chunks to update their images from the mapping.
+    # Each chunk is its own short query, so the flushes below never write
+    # while a cursor is open. Plain tuples are enough: only the id and the
+    # new URL are written back. Unnamed foods are never updated, so filter
+    # them out in the query.
+    foods = pk_chunks(
+        FoodEntry.objects.exclude(name="").values_list("id", "name", "imageUrl")
+    )
 
     updated_count = 0
-    for food in foods:
-        # Normalize name logic (must match analyze_food_images.py)
-        if not food.name:
-            continue
-
-        parts = food.name.split(",")
-        base_name = parts[0].strip().lower()
-
-        # Safe filename logic (must match generate_food_images.py)
-        safe_name = (
-            base_name.replace(" ", "_")
-            .replace(",", "")
-            .replace("/", "_")
-            .replace("(", "")
-            .replace(")", "")
-        )
-
-        if safe_name in mapping:
-            # Only update if the URL is different to avoid unnecessary writes
-            if food.imageUrl != mapping[safe_name]:
-                food.imageUrl = mapping[safe_name]
-                food.save()
-                updated_count += 1
+    to_update = []
+    for food_id, name, image_url in foods:
+        new_url = mapping.get(safe_name_for(name))
+
+        # Only update if the URL is different to avoid unnecessary writes
+        if new_url is not None and image_url != new_url:
+            to_update.append(FoodEntry(id=food_id, imageUrl=new_url))
+            updated_count += 1
+
+            if len(to_update) >= 1000:
+                FoodEntry.objects.bulk_update(to_update, ["imageUrl"], batch_size=1000)
+                to_update.clear()
+                # Drop the DEBUG query log
+                reset_queries()
+
+    if to_update:
+        FoodEntry.objects.bulk_update(to_update, ["imageUrl"], batch_size=1000)
 
     print(f"Updated {updated_count} food items with new images.")
 
 
 class Migration(migrations.Migration):
 
+    # Data-only: each 1000-row bulk_update commits on its own instead of
+    # holding row locks for the whole table. A failed run leaves the updated
+    # rows pointing at their new image, and re-running only rewrites the
+    # URLs that still differ from the mapping.
+    atomic = False
+
     dependencies = [
         ("foods", "0023_add_allergen_tags"),
     ]
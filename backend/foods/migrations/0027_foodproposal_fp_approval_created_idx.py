@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0026_normalize_nutrients_to_100g'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodproposal',
+            index=models.Index(fields=['isApproved', '-createdAt'], name='fp_approval_created_idx'),
+        ),
+    ]
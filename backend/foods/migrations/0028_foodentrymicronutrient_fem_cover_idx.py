@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0027_foodproposal_fp_approval_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodentrymicronutrient',
+            index=models.Index(fields=['food_entry', 'micronutrient', 'value'], name='fem_cover_idx'),
+        ),
+    ]
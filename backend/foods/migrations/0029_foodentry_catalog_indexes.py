@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0028_foodentrymicronutrient_fem_cover_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodentry',
+            index=models.Index(fields=['category'], name='fe_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodentry',
+            index=models.Index(fields=['nutritionScore'], name='fe_nutrition_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodentry',
+            index=models.Index(fields=['price_unit', 'currency', 'base_price'], name='fe_price_idx'),
+        ),
+    ]
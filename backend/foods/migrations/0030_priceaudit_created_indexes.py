@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0029_foodentry_catalog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='priceaudit',
+            index=models.Index(fields=['created_at'], name='pa_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priceaudit',
+            index=models.Index(fields=['food', 'created_at'], name='pa_food_created_idx'),
+        ),
+    ]
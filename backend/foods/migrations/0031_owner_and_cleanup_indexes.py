@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0030_priceaudit_created_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodproposal',
+            index=models.Index(fields=['proposedBy', '-createdAt'], name='fp_proposer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imagecache',
+            index=models.Index(fields=['access_count', 'created_at'], name='ic_access_created_idx'),
+        ),
+    ]
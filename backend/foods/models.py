@@ -32,6 +32,13 @@ class FoodEntryMicronutrient(models.Model):
 
     class Meta:
         unique_together = ('food_entry', 'micronutrient')
+        indexes = [
+            # Covering index for "all micronutrients of a food" reads, so the
+            # value comes from the index without a table lookup
+            models.Index(
+                fields=['food_entry', 'micronutrient', 'value'], name='fem_cover_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.food_entry} – {self.micronutrient.name}: {self.value}'
@@ -79,6 +86,19 @@ class FoodEntry(models.Model):
         related_name="created_food_entries",
     )
 
+    class Meta:
+        indexes = [
+            # Catalog: category filter and the list of available categories
+            models.Index(fields=["category"], name="fe_category_idx"),
+            # Catalog: sort by nutrition score
+            models.Index(fields=["nutritionScore"], name="fe_nutrition_score_idx"),
+            # Price tertiles: sorted prices per unit and currency
+            models.Index(
+                fields=["price_unit", "currency", "base_price"], name="fe_price_idx"
+            ),
+        ]
+
+
 class FoodProposal(models.Model):
     """
     Represents a request to make a private FoodEntry public.
@@ -103,6 +123,29 @@ class FoodProposal(models.Model):
     createdAt = models.DateTimeField(default=django.utils.timezone.now)
     proposedBy = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Moderation list: filter by status, newest first
+            models.Index(
+                fields=["isApproved", "-createdAt"], name="fp_approval_created_idx"
+            ),
+            # A user's own proposals, newest first
+            models.Index(
+                fields=["proposedBy", "-createdAt"], name="fp_proposer_created_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the approval status as loaded from the database so callers
+        (e.g. the admin) can detect status changes without re-fetching the row.
+        """
+        instance = super().from_db(db, field_names, values)
+        if "isApproved" in field_names:
+            instance._loaded_isApproved = values[field_names.index("isApproved")]
+        return instance
+
 
 class PriceCategoryThreshold(models.Model):
     price_unit = models.CharField(max_length=20, choices=PriceUnit.choices)
@@ -167,6 +210,11 @@ class PriceAudit(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            # Audit list: newest first, overall and per food
+            models.Index(fields=["created_at"], name="pa_created_idx"),
+            models.Index(fields=["food", "created_at"], name="pa_food_created_idx"),
+        ]
 
     def __str__(self):
         descriptor = (
@@ -232,6 +280,10 @@ class ImageCache(models.Model):
         indexes = [
             models.Index(fields=["last_accessed"]),
             models.Index(fields=["created_at"]),
+            # Cleanup: never-accessed images older than a cutoff
+            models.Index(
+                fields=["access_count", "created_at"], name="ic_access_created_idx"
+            ),
         ]
 
     def __str__(self):
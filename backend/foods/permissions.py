@@ -14,5 +14,11 @@ class IsPriceModerator(BasePermission):
             return False
         if user.is_staff or user.is_superuser:
             return True
-        return user.groups.filter(name__in=PRICE_MODERATOR_GROUPS).exists()
-
+        # Views may check this several times per request; cache the group
+        # lookup on the user instance, as Django's ModelBackend does for
+        # permissions. Each request authenticates a fresh user object.
+        if not hasattr(user, "_price_moderator_cache"):
+            user._price_moderator_cache = user.groups.filter(
+                name__in=PRICE_MODERATOR_GROUPS
+            ).exists()
+        return user._price_moderator_cache
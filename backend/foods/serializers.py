@@ -1,13 +1,19 @@
 import logging
+from functools import lru_cache, partial
 from urllib.parse import quote
 
+from django.db import transaction
+from django.db.models import Prefetch, Q
 from rest_framework import serializers
 
 from api.db_initialization.nutrition_score import calculate_nutrition_score
 from foods.constants import DEFAULT_CURRENCY, PriceCategory, PriceUnit
+from foods.image_generation import generate_food_image_async
 from foods.models import (
     FoodEntry,
+    FoodEntryMicronutrient,
     FoodProposal,
+    Micronutrient,
     PriceAudit,
     PriceCategoryThreshold,
     PriceReport,
@@ -16,6 +22,76 @@ from foods.models import (
 logger = logging.getLogger(__name__)
 
 
+def prefetch_food_entry_relations(queryset):
+    """
+    Prefetch the relations FoodEntrySerializer reads, so serializing any
+    number of foods costs a fixed number of queries.
+    """
+    return queryset.prefetch_related(
+        "allergens",
+        Prefetch(
+            "micronutrient_values",
+            queryset=FoodEntryMicronutrient.objects.select_related("micronutrient"),
+        ),
+    )
+
+
+def micronutrient_rows(food_entry):
+    """
+    (name, unit, value) for each micronutrient of a food. Prefetched links
+    are read from memory; otherwise one query returns plain tuples without
+    building model instances.
+    """
+    if "micronutrient_values" in getattr(food_entry, "_prefetched_objects_cache", {}):
+        return [
+            (link.micronutrient.name, link.micronutrient.unit, link.value)
+            for link in food_entry.micronutrient_values.all()
+        ]
+    return food_entry.micronutrient_values.values_list(
+        "micronutrient__name", "micronutrient__unit", "value"
+    )
+
+
+def parse_micronutrient_key(key):
+    """
+    Split a frontend micronutrient key "Name (unit)" into (name, unit).
+    Keys without a unit default to grams.
+    """
+    name, sep, rest = key.partition("(")
+    if not sep or ")" not in key:
+        return key, "g"
+    return name.strip(), rest.partition(")")[0].strip()
+
+
+@lru_cache(maxsize=4096)
+def proxied_image_url(image_url):
+    """
+    Transform external image URLs to use the caching proxy.
+    Local URLs are returned as-is.
+
+    Depends only on the URL, so results are cached: list pages serialize the
+    same shared image URLs over and over.
+    """
+    if not image_url:
+        return ""
+
+    # Skip proxy for local media URLs
+    if image_url.startswith("/media/"):
+        return image_url
+
+    # Skip proxy for localhost/127.0.0.1
+    if "localhost" in image_url or "127.0.0.1" in image_url:
+        return image_url
+
+    # Use proxy for external URLs
+    # Always return relative URLs - the browser will resolve them against
+    # the current page origin (e.g., http://localhost:8080)
+    # This fixes issues in Docker where build_absolute_uri() creates URLs
+    # without the correct port (http://localhost instead of http://localhost:8080)
+    encoded_url = quote(image_url, safe="")
+    return f"/api/foods/image-proxy/?url={encoded_url}"
+
+
 # Serializer for FoodEntry model
 class FoodEntrySerializer(serializers.ModelSerializer):
     imageUrl = serializers.SerializerMethodField()
@@ -32,36 +108,15 @@ class FoodEntrySerializer(serializers.ModelSerializer):
         )
 
     def get_imageUrl(self, obj):
-        """
-        Transform external image URLs to use the caching proxy.
-        Local URLs are returned as-is.
-        """
-        if not obj.imageUrl:
-            return ""
-
-        # Skip proxy for local media URLs
-        if obj.imageUrl.startswith("/media/"):
-            return obj.imageUrl
-
-        # Skip proxy for localhost/127.0.0.1
-        if "localhost" in obj.imageUrl or "127.0.0.1" in obj.imageUrl:
-            return obj.imageUrl
-
-        # Use proxy for external URLs
-        # Always return relative URLs - the browser will resolve them against
-        # the current page origin (e.g., http://localhost:8080)
-        # This fixes issues in Docker where build_absolute_uri() creates URLs
-        # without the correct port (http://localhost instead of http://localhost:8080)
-        encoded_url = quote(obj.imageUrl, safe="")
-        return f"/api/foods/image-proxy/?url={encoded_url}"
+        return proxied_image_url(obj.imageUrl)
 
     def get_micronutrients(self, obj):
         return {
-            link.micronutrient.name: {
-                'value': round(link.value,2),
-                'unit': link.micronutrient.unit
+            name: {
+                'value': round(value,2),
+                'unit': unit
             }
-            for link in obj.micronutrient_values.all()
+            for name, unit, value in micronutrient_rows(obj)
         }
 
 
@@ -114,10 +169,9 @@ class FoodProposalSerializer(serializers.ModelSerializer):
             return {}
 
         result = {}
-        for link in obj.food_entry.micronutrient_values.all():
+        for name, unit, value in micronutrient_rows(obj.food_entry):
             # Combine name and unit into key: "Vitamin C (mg)"
-            key = f"{link.micronutrient.name} ({link.micronutrient.unit})"
-            result[key] = round(link.value, 2)
+            result[f"{name} ({unit})"] = round(value, 2)
         return result
 
     class Meta:
@@ -166,32 +220,58 @@ class FoodProposalSerializer(serializers.ModelSerializer):
 
         return attrs
 
-    def _trigger_background_image_generation(self, food_entry_id: int, food_name: str) -> None:
+    @staticmethod
+    def _create_micronutrient_links(food_entry, values, units):
         """
-        Trigger background AI image generation for the food entry.
-        This is non-blocking - the image will be generated and saved asynchronously.
+        Link food_entry to the given micronutrient values ({name: value}),
+        creating any micronutrients that do not exist yet with the unit
+        from units ({name: unit}).
+
+        Names are matched case-insensitively, like get_or_create on MySQL:
+        "iron, fe" links to an existing "Iron, Fe".
         """
-        try:
-            print(f"[Serializer] Triggering background image generation for: {food_name} (ID: {food_entry_id})")
-            from foods.image_generation import generate_food_image_async, is_image_generation_enabled
-            
-            if not is_image_generation_enabled():
-                print("[Serializer] AI image generation is NOT enabled (missing credentials)")
-                logger.info("AI image generation is not configured, skipping")
-                return
-            
-            print(f"[Serializer] Calling generate_food_image_async...")
-            logger.info(f"Triggering background image generation for food proposal: {food_name} (ID: {food_entry_id})")
-            generate_food_image_async(food_entry_id, food_name)
-            print(f"[Serializer] Background generation triggered successfully")
-            
-        except Exception as e:
-            print(f"[Serializer] ERROR: {e}")
-            logger.error(f"Error triggering background image generation for {food_name}: {e}")
+        # Submitted names differing only in case are the same micronutrient;
+        # the last value wins
+        submitted = {}
+        for name, value in values.items():
+            key = name.casefold()
+            first_name = submitted[key][0] if key in submitted else name
+            submitted[key] = (first_name, value)
+
+        def lookup_ids():
+            query = Q()
+            for name, _ in submitted.values():
+                query |= Q(name__iexact=name)
+            return {
+                name.casefold(): micronutrient_id
+                for name, micronutrient_id in Micronutrient.objects.filter(
+                    query
+                ).values_list("name", "id")
+            }
 
-    def create(self, validated_data):
-        from foods.models import Micronutrient, FoodEntryMicronutrient
+        micronutrient_ids = lookup_ids()
+        missing = [
+            Micronutrient(name=name, unit=units[name])
+            for key, (name, _) in submitted.items()
+            if key not in micronutrient_ids
+        ]
+        if missing:
+            # ignore_conflicts: a concurrent request may create the same name
+            Micronutrient.objects.bulk_create(missing, ignore_conflicts=True)
+            micronutrient_ids = lookup_ids()
+
+        FoodEntryMicronutrient.objects.bulk_create(
+            [
+                FoodEntryMicronutrient(
+                    food_entry=food_entry,
+                    micronutrient_id=micronutrient_ids[key],
+                    value=value,
+                )
+                for key, (_, value) in submitted.items()
+            ]
+        )
 
+    def create(self, validated_data):
         request = self.context["request"]
 
         food_entry = validated_data.get("food_entry")
@@ -215,48 +295,44 @@ class FoodProposalSerializer(serializers.ModelSerializer):
         needs_image_generation = not food_entry_data.get('imageUrl')
         food_name = food_entry_data.get('name', '')
 
-        # Create the FoodEntry first (without image if we need to generate one)
-        food_entry = FoodEntry.objects.create(
-            **food_entry_data,
-            validated=False,
-            createdBy=request.user,
-        )
-
-        # Create micronutrient relationships
+        # Parse micronutrients before touching the database
         # micronutrients_data format: {"Vitamin C (mg)": 28.1, "Iron, Fe (mg)": 2.7}
+        micronutrient_values = {}
+        micronutrient_units = {}
         for micro_name_with_unit, value in micronutrients_data.items():
-            # Parse micronutrient name and unit from format "Name (unit)"
-            if "(" in micro_name_with_unit and ")" in micro_name_with_unit:
-                name_part = micro_name_with_unit.split("(")[0].strip()
-                unit_part = micro_name_with_unit.split("(")[1].split(")")[0].strip()
-            else:
-                name_part = micro_name_with_unit
-                unit_part = "g"
-
             if value is not None:
-                # Get or create the Micronutrient
-                micronutrient, _ = Micronutrient.objects.get_or_create(
-                    name=name_part,
-                    defaults={'unit': unit_part}
-                )
+                name_part, unit_part = parse_micronutrient_key(micro_name_with_unit)
+                micronutrient_values[name_part] = float(value)
+                micronutrient_units.setdefault(name_part, unit_part)
+
+        # Entry, micronutrient links and proposal are saved together, with
+        # the links written in a few batched queries instead of per item
+        with transaction.atomic():
+            # Create the FoodEntry first (without image if we need to generate one)
+            food_entry = FoodEntry.objects.create(
+                **food_entry_data,
+                validated=False,
+                createdBy=request.user,
+            )
 
-                # Create the relationship
-                FoodEntryMicronutrient.objects.create(
-                    food_entry=food_entry,
-                    micronutrient=micronutrient,
-                    value=float(value)
+            if micronutrient_values:
+                self._create_micronutrient_links(
+                    food_entry, micronutrient_values, micronutrient_units
                 )
 
-        # Create the proposal
-        proposal = FoodProposal.objects.create(
-            food_entry=food_entry,
-            proposedBy=request.user,
-        )
-        
-        # Trigger background image generation AFTER creating the entry
-        # This allows the API to return immediately while image generates in background
+            # Create the proposal
+            proposal = FoodProposal.objects.create(
+                food_entry=food_entry,
+                proposedBy=request.user,
+            )
+
+        # Trigger background image generation once the entry is committed, so
+        # the worker can see it and the API returns without waiting on dispatch
         if needs_image_generation and food_name:
-            self._trigger_background_image_generation(food_entry.id, food_name)
+            transaction.on_commit(
+                partial(generate_food_image_async, food_entry.id, food_name),
+                robust=True,
+            )
 
         return proposal
 
@@ -278,6 +354,30 @@ class FoodProposalStatusSerializer(serializers.ModelSerializer):
             "isApproved",
         )
         read_only_fields = fields
+
+    def to_representation(self, instance):
+        # Resolve food_entry once instead of walking each dotted
+        # "food_entry.X" source separately for every field
+        food_entry = instance.food_entry
+        if food_entry is not None:
+            food_data = {
+                "name": food_entry.name,
+                "category": food_entry.category,
+                "servingSize": food_entry.servingSize,
+                "imageUrl": food_entry.imageUrl,
+            }
+        else:
+            # DRF skips read-only fields whose source cannot be resolved
+            food_data = {}
+
+        return {
+            "id": instance.id,
+            **food_data,
+            "createdAt": self.fields["createdAt"].to_representation(
+                instance.createdAt
+            ),
+            "isApproved": instance.isApproved,
+        }
         
 class FoodPriceUpdateSerializer(serializers.Serializer):
     base_price = serializers.DecimalField(max_digits=10, decimal_places=2)
@@ -306,6 +406,10 @@ class FoodPriceUpdateSerializer(serializers.Serializer):
         return attrs
 
 
+# Display labels for price units, built once instead of per serialized row
+PRICE_UNIT_LABELS = dict(PriceUnit.choices)
+
+
 class PriceCategoryThresholdSerializer(serializers.ModelSerializer):
     price_unit_display = serializers.SerializerMethodField()
 
@@ -323,7 +427,7 @@ class PriceCategoryThresholdSerializer(serializers.ModelSerializer):
         ]
 
     def get_price_unit_display(self, obj):
-        return obj.get_price_unit_display()
+        return PRICE_UNIT_LABELS.get(obj.price_unit, obj.price_unit)
 
 
 class PriceThresholdRecalculateSerializer(serializers.Serializer):
@@ -7,6 +7,8 @@ and recipe cost recalculations.
 from __future__ import annotations
 
 import math
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
 from typing import Iterable, Optional, Tuple
@@ -124,8 +126,8 @@ def _as_decimal(value) -> Optional[Decimal]:
         return None
 
 
-def _fetch_sorted_prices(price_unit: str, currency: str) -> Iterable[Decimal]:
-    prices = (
+def _sorted_prices(price_unit: str, currency: str) -> models.QuerySet:
+    return (
         FoodEntry.objects.filter(
             price_unit=price_unit,
             currency=currency,
@@ -135,26 +137,24 @@ def _fetch_sorted_prices(price_unit: str, currency: str) -> Iterable[Decimal]:
         .order_by("base_price")
         .values_list("base_price", flat=True)
     )
-    for price in prices:
-        decimal_price = _as_decimal(price)
-        if decimal_price is not None:
-            yield decimal_price
 
 
 def _compute_tertiles(
-    prices: Iterable[Decimal],
+    price_unit: str, currency: str
 ) -> Tuple[Optional[Decimal], Optional[Decimal]]:
-    price_list = list(prices)
-    if not price_list:
+    # Count, then fetch only the two cut-off prices by offset instead of
+    # loading every price into Python
+    prices = _sorted_prices(price_unit, currency)
+    count = prices.count()
+    if not count:
         return None, None
 
-    count = len(price_list)
     lower_index = max(0, math.ceil(count / 3) - 1)
     upper_index = max(0, math.ceil((2 * count) / 3) - 1)
-    return price_list[lower_index], price_list[upper_index]
+    return _as_decimal(prices[lower_index]), _as_decimal(prices[upper_index])
 
 
-def _log_price_audit(
+def _build_price_audit(
     *,
     change_type: str,
     price_unit: str,
@@ -167,8 +167,8 @@ def _log_price_audit(
     old_category=None,
     new_category=None,
     metadata=None,
-):
-    PriceAudit.objects.create(
+) -> PriceAudit:
+    return PriceAudit(
         food=food,
         change_type=change_type,
         price_unit=price_unit,
@@ -183,6 +183,40 @@ def _log_price_audit(
     )
 
 
+_price_audit_buffer: ContextVar[Optional[list]] = ContextVar(
+    "price_audit_buffer", default=None
+)
+
+
+@contextmanager
+def batched_price_audits():
+    """
+    Collect the price audits logged inside the block and write them with a
+    single bulk INSERT when it exits. Nested blocks share the outer buffer.
+    Nothing is written if the block raises.
+    """
+    if _price_audit_buffer.get() is not None:
+        yield
+        return
+
+    buffer: list = []
+    token = _price_audit_buffer.set(buffer)
+    try:
+        yield
+    finally:
+        _price_audit_buffer.reset(token)
+    PriceAudit.objects.bulk_create(buffer, batch_size=500)
+
+
+def _log_price_audit(**kwargs):
+    audit = _build_price_audit(**kwargs)
+    buffer = _price_audit_buffer.get()
+    if buffer is not None:
+        buffer.append(audit)
+    else:
+        audit.save(force_insert=True)
+
+
 @transaction.atomic
 def recalculate_price_thresholds(
     price_unit: str,
@@ -197,13 +231,20 @@ def recalculate_price_thresholds(
         defaults={"updates_since_recalculation": 0},
     )
 
-    lower, upper = _compute_tertiles(_fetch_sorted_prices(price_unit, currency))
+    lower, upper = _compute_tertiles(price_unit, currency)
 
     threshold.lower_threshold = lower
     threshold.upper_threshold = upper
     threshold.updates_since_recalculation = 0
     threshold.last_recalculated_at = timezone.now()
-    threshold.save()
+    threshold.save(
+        update_fields=[
+            "lower_threshold",
+            "upper_threshold",
+            "updates_since_recalculation",
+            "last_recalculated_at",
+        ]
+    )
 
     _log_price_audit(
         change_type=PriceAudit.ChangeType.THRESHOLD_RECALC,
@@ -355,40 +396,42 @@ def recalculate_recipes_for_food(entry: FoodEntry, *, changed_by=None):
         .select_for_update()
     )
 
-    for recipe in recipes:
-        total_cost = Decimal("0.00")
-        ingredient_categories = []
-        for ingredient in recipe.ingredients.all():
-            cost = ingredient.estimated_cost
-            total_cost += cost
-            if ingredient.food.price_category:
-                ingredient_categories.append(ingredient.food.price_category)
-
-        quantized_cost = total_cost.quantize(Decimal("0.01")) if total_cost else None
-        recipe.total_cost = quantized_cost
-        recipe.currency = entry.currency
-        recipe.price_category = _derive_recipe_category(
-            ingredient_categories,
-            fallback_cost=quantized_cost,
-            currency=entry.currency,
-        )
-        recipe.save(
-            update_fields=["total_cost", "currency", "price_category", "updated_at"]
-        )
-
-        _log_price_audit(
-            change_type=PriceAudit.ChangeType.RECIPE_RECALC,
-            price_unit=entry.price_unit,
-            currency=entry.currency,
-            food=entry,
-            changed_by=changed_by,
-            reason="Recipe cost refreshed after price change",
-            metadata={
-                "recipe_id": recipe.id,
-                "recipe_price_category": recipe.price_category,
-                "recipe_total_cost": str(quantized_cost) if quantized_cost else None,
-            },
-        )
+    # One INSERT for every recipe's audit row instead of one per recipe
+    with batched_price_audits():
+        for recipe in recipes:
+            total_cost = Decimal("0.00")
+            ingredient_categories = []
+            for ingredient in recipe.ingredients.all():
+                cost = ingredient.estimated_cost
+                total_cost += cost
+                if ingredient.food.price_category:
+                    ingredient_categories.append(ingredient.food.price_category)
+
+            quantized_cost = total_cost.quantize(Decimal("0.01")) if total_cost else None
+            recipe.total_cost = quantized_cost
+            recipe.currency = entry.currency
+            recipe.price_category = _derive_recipe_category(
+                ingredient_categories,
+                fallback_cost=quantized_cost,
+                currency=entry.currency,
+            )
+            recipe.save(
+                update_fields=["total_cost", "currency", "price_category", "updated_at"]
+            )
+
+            _log_price_audit(
+                change_type=PriceAudit.ChangeType.RECIPE_RECALC,
+                price_unit=entry.price_unit,
+                currency=entry.currency,
+                food=entry,
+                changed_by=changed_by,
+                reason="Recipe cost refreshed after price change",
+                metadata={
+                    "recipe_id": recipe.id,
+                    "recipe_price_category": recipe.price_category,
+                    "recipe_total_cost": str(quantized_cost) if quantized_cost else None,
+                },
+            )
 
 
 @transaction.atomic
@@ -553,6 +596,64 @@ def approve_food_proposal(proposal: FoodProposal, *, changed_by=None):
     return proposal, entry
 
 
+@transaction.atomic
+def approve_food_proposals(proposals: models.QuerySet, *, changed_by=None) -> int:
+    """
+    Approve many food proposals at once, with the same effect as calling
+    approve_food_proposal on each: proposals and their FoodEntries are
+    updated with one UPDATE each, and the price audits of priced entries
+    (including any threshold recalculations) are written in one INSERT.
+    Returns the number of proposals approved.
+    """
+    pending = list(
+        proposals.exclude(isApproved=True).select_related("food_entry")
+    )
+    if not pending:
+        return 0
+
+    FoodProposal.objects.filter(pk__in=[p.pk for p in pending]).update(
+        isApproved=True
+    )
+    FoodEntry.objects.filter(
+        pk__in=[p.food_entry_id for p in pending if p.food_entry_id]
+    ).update(validated=True)
+
+    # Price categories depend on per-unit thresholds, so priced entries are
+    # still categorised one by one
+    with batched_price_audits():
+        for proposal in pending:
+            entry = proposal.food_entry
+            if entry is None:
+                continue
+            entry.validated = True
+            if entry.base_price is None:
+                continue
+
+            entry.price_category = assign_price_category_value(
+                entry.base_price,
+                entry.price_unit,
+                entry.currency,
+                changed_by=changed_by,
+            )
+            entry.save(update_fields=["price_category"])
+            register_price_update(entry, changed_by=changed_by)
+            _log_price_audit(
+                change_type=PriceAudit.ChangeType.PRICE_UPDATE,
+                price_unit=entry.price_unit,
+                currency=entry.currency,
+                food=entry,
+                changed_by=changed_by,
+                reason="Proposal approved and made public",
+                old_price=None,
+                new_price=entry.base_price,
+                old_category=None,
+                new_category=entry.price_category,
+                metadata={"proposal_id": proposal.id},
+            )
+
+    return len(pending)
+
+
 @transaction.atomic
 def reject_food_proposal(proposal: FoodProposal):
     """
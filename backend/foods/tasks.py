@@ -0,0 +1,59 @@
+"""
+Celery tasks for the foods app.
+
+Only used when CELERY_BROKER_URL is configured; otherwise image generation
+falls back to background threads (see foods.image_generation).
+
+Image generation runs on its own "image_generation" queue. Celery enforces
+rate limits per worker instance, so that queue must be consumed by a single
+worker for the limit to hold for the whole deployment.
+"""
+
+import logging
+
+from celery import shared_task
+
+from foods.image_generation import (
+    generate_food_image,
+    is_image_generation_enabled,
+    save_generated_image,
+)
+from foods.models import FoodEntry
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    bind=True,
+    queue="image_generation",
+    rate_limit="10/m",
+    max_retries=3,
+    default_retry_delay=60,
+)
+def generate_food_image_task(self, food_entry_id: int, food_name: str) -> bool:
+    """
+    Generate an AI image for a FoodEntry and store its URL.
+
+    The rate limit keeps Fal API usage within quota as long as a single
+    worker consumes the image_generation queue; transient generation/upload
+    failures are retried.
+    """
+    # Missing credentials are not transient; don't spend the retries on them
+    if not is_image_generation_enabled():
+        logger.info(f"[Task] AI image generation is not configured, skipping FoodEntry {food_entry_id}")
+        return False
+
+    # Duplicate tasks for the same entry (e.g. a double-clicked approval) may be
+    # queued on different workers; skip the Fal call once an image is stored
+    if FoodEntry.objects.filter(id=food_entry_id).exclude(imageUrl="").exists():
+        logger.info(f"[Task] FoodEntry {food_entry_id} already has an image, skipping")
+        return False
+
+    logger.info(f"[Task] Starting image generation for FoodEntry {food_entry_id}: {food_name}")
+
+    image_url = generate_food_image(food_name)
+    if not image_url:
+        logger.warning(f"[Task] Failed to generate image for FoodEntry {food_entry_id}, retrying")
+        raise self.retry()
+
+    return save_generated_image(food_entry_id, image_url)
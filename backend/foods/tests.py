@@ -1,11 +1,23 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
 
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 from rest_framework import status
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.utils import timezone
 from foods.constants import DEFAULT_CURRENCY, PriceCategory, PriceUnit
 from foods.models import (
     FoodEntry,
@@ -14,10 +26,16 @@ from foods.models import (
     Micronutrient,
     FoodEntryMicronutrient,
     Allergen,
+    ImageCache,
 )
-from foods.serializers import FoodEntrySerializer
+from foods import image_generation
+from foods import views as food_views
+from foods.permissions import IsPriceModerator
+from foods.serializers import FoodEntrySerializer, PriceCategoryThresholdSerializer
 from foods.services import (
     approve_food_proposal,
+    approve_food_proposals,
+    batched_price_audits,
     override_food_price_category,
     recalculate_price_thresholds,
     update_food_price,
@@ -507,6 +525,171 @@ class FoodProposalTests(APITestCase):
             proposal.food_entry.imageUrl, "https://example.com/custom-food.jpg"
         )
 
+    def test_list_my_proposal_statuses(self):
+        """Status list returns the proposal and its food's summary fields"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        food_entry = self._create_private_food(
+            name="Status Soup",
+            category="Soups",
+            servingSize=250,
+            imageUrl="https://example.com/soup.jpg",
+        )
+        FoodProposal.objects.create(food_entry=food_entry, proposedBy=self.user)
+
+        response = self.client.get(reverse("get_food_proposal"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        item = response.data[0]
+        self.assertEqual(item["name"], "Status Soup")
+        self.assertEqual(item["category"], "Soups")
+        self.assertEqual(item["servingSize"], 250)
+        self.assertEqual(item["imageUrl"], "https://example.com/soup.jpg")
+        self.assertIsNone(item["isApproved"])
+
+    def test_list_my_proposal_statuses_without_food_entry(self):
+        """A proposal without a food entry omits the food fields"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        FoodProposal.objects.create(food_entry=None, proposedBy=self.user)
+
+        response = self.client.get(reverse("get_food_proposal"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(
+            list(response.data[0]), ["id", "createdAt", "isApproved"]
+        )
+
+    def test_submit_food_proposal_matches_micronutrient_case_insensitively(self):
+        """A key differing only in case links the existing micronutrient"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        iron, _ = Micronutrient.objects.get_or_create(
+            name="Iron, Fe", defaults={"unit": "mg"}
+        )
+        micronutrient_count = Micronutrient.objects.count()
+
+        data = {
+            "name": "Lowercase Cereal",
+            "category": "Grains",
+            "servingSize": 40,
+            "caloriesPerServing": 150,
+            "proteinContent": 3,
+            "fatContent": 1,
+            "carbohydrateContent": 33,
+            "imageUrl": "https://example.com/cereal.jpg",
+            "micronutrients": {"iron, fe (mg)": 4.2, "IRON, FE (mg)": 5.0},
+        }
+        response = self.client.post(self.proposal_url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        food_entry = FoodProposal.objects.get(
+            food_entry__name="Lowercase Cereal"
+        ).food_entry
+        self.assertEqual(
+            list(food_entry.micronutrient_values.values_list("micronutrient", "value")),
+            [(iron.id, 5.0)],
+        )
+        self.assertEqual(Micronutrient.objects.count(), micronutrient_count)
+
+    @patch("foods.serializers.generate_food_image_async")
+    def test_image_generation_is_queued_after_commit(self, generate_async):
+        """Proposals without an image trigger generation once committed"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        data = {
+            "name": "Imageless Stew",
+            "category": "Meals",
+            "servingSize": 250,
+            "caloriesPerServing": 300,
+            "proteinContent": 15,
+            "fatContent": 10,
+            "carbohydrateContent": 35,
+        }
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(self.proposal_url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        generate_async.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        food_entry = FoodProposal.objects.get(
+            food_entry__name="Imageless Stew"
+        ).food_entry
+        generate_async.assert_called_once_with(food_entry.id, "Imageless Stew")
+
+    def test_submit_food_proposal_with_micronutrients(self):
+        """Flat proposals link existing and new micronutrients"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        iron, _ = Micronutrient.objects.get_or_create(
+            name="Iron, Fe", defaults={"unit": "mg"}
+        )
+
+        data = {
+            "name": "Fortified Cereal",
+            "category": "Grains",
+            "servingSize": 40,
+            "caloriesPerServing": 150,
+            "proteinContent": 3,
+            "fatContent": 1,
+            "carbohydrateContent": 33,
+            "imageUrl": "https://example.com/cereal.jpg",
+            "micronutrients": {
+                "Iron, Fe (mg)": 8.1,
+                "Test Vitamin Q (µg)": 2.5,
+                "Sodium, Na (mg)": None,
+            },
+        }
+        response = self.client.post(self.proposal_url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        food_entry = FoodProposal.objects.get(
+            food_entry__name="Fortified Cereal"
+        ).food_entry
+        links = {
+            link.micronutrient.name: (link.value, link.micronutrient.unit)
+            for link in food_entry.micronutrient_values.select_related("micronutrient")
+        }
+        self.assertEqual(
+            links, {"Iron, Fe": (8.1, iron.unit), "Test Vitamin Q": (2.5, "µg")}
+        )
+        self.assertEqual(Micronutrient.objects.filter(name="Iron, Fe").count(), 1)
+        self.assertEqual(
+            response.data["micronutrients"],
+            {f"Iron, Fe ({iron.unit})": 8.1, "Test Vitamin Q (µg)": 2.5},
+        )
+
+
+class PriceModeratorPermissionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="groupmod",
+            email="groupmod@example.com",
+            password="ModPass123!",
+        )
+        self.factory = APIRequestFactory()
+
+    def _request(self):
+        request = self.factory.get("/")
+        request.user = User.objects.get(pk=self.user.pk)
+        return request
+
+    def test_group_lookup_runs_once_per_request(self):
+        self.user.groups.add(Group.objects.create(name="content_manager"))
+        request = self._request()
+        permission = IsPriceModerator()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(permission.has_permission(request, None))
+            self.assertTrue(permission.has_permission(request, None))
+
+    def test_group_changes_apply_to_the_next_request(self):
+        self.assertFalse(IsPriceModerator().has_permission(self._request(), None))
+
+        self.user.groups.add(Group.objects.create(name="community_moderator"))
+
+        self.assertTrue(IsPriceModerator().has_permission(self._request(), None))
+
 
 class PriceCategorizationTests(TestCase):
     def setUp(self):
@@ -528,6 +711,17 @@ class PriceCategorizationTests(TestCase):
         self.assertEqual(threshold.lower_threshold, Decimal("20"))
         self.assertEqual(threshold.upper_threshold, Decimal("40"))
 
+    def test_threshold_serializer_shows_price_unit_label(self):
+        seed_price_entries([10, 20, 30])
+        threshold = recalculate_price_thresholds(
+            PriceUnit.PER_100G, currency=DEFAULT_CURRENCY
+        )
+
+        data = PriceCategoryThresholdSerializer(threshold).data
+
+        self.assertEqual(data["price_unit"], PriceUnit.PER_100G)
+        self.assertEqual(data["price_unit_display"], "Per 100g")
+
     def test_update_food_price_assigns_category_and_logs_audit(self):
         seed_price_entries([10, 20, 30, 40, 50, 60])
         entry = create_food_entry("Target Food")
@@ -581,6 +775,27 @@ class PriceCategorizationTests(TestCase):
         self.assertEqual(entry.category_overridden_by, self.moderator)
         self.assertEqual(entry.category_override_reason, override_reason)
 
+    def test_batched_price_audits_are_written_on_exit(self):
+        seed_price_entries([10, 20, 30, 40, 50, 60])
+        entry = create_food_entry("Batched Food")
+
+        with batched_price_audits():
+            for category in (PriceCategory.CHEAP, PriceCategory.PREMIUM):
+                override_food_price_category(
+                    entry,
+                    category=category,
+                    changed_by=self.moderator,
+                    reason="Bulk edit",
+                )
+            self.assertFalse(entry.price_audits.exists())
+
+        self.assertEqual(
+            entry.price_audits.filter(
+                change_type=PriceAudit.ChangeType.CATEGORY_OVERRIDE
+            ).count(),
+            2,
+        )
+
 
 class FoodProposalApprovalTests(TestCase):
     def setUp(self):
@@ -640,6 +855,41 @@ class FoodProposalApprovalTests(TestCase):
             ).exists()
         )
 
+    def test_approve_food_proposals_approves_pending_in_bulk(self):
+        priced = self._create_proposal(Decimal("32.50"))
+        unpriced = self._create_proposal(None)
+        approved = self._create_proposal(Decimal("15.00"))
+        approve_food_proposal(approved, changed_by=self.moderator)
+
+        count = approve_food_proposals(
+            FoodProposal.objects.filter(pk__in=[priced.pk, unpriced.pk, approved.pk]),
+            changed_by=self.moderator,
+        )
+
+        self.assertEqual(count, 2)
+        for proposal in (priced, unpriced):
+            proposal.refresh_from_db()
+            self.assertTrue(proposal.isApproved)
+            self.assertTrue(proposal.food_entry.validated)
+        self.assertEqual(priced.food_entry.price_category, PriceCategory.MID)
+        self.assertIsNone(unpriced.food_entry.price_category)
+        self.assertEqual(
+            PriceAudit.objects.filter(
+                food=priced.food_entry,
+                change_type=PriceAudit.ChangeType.PRICE_UPDATE,
+                metadata__proposal_id=priced.pk,
+            ).count(),
+            1,
+        )
+
+    def test_loaded_proposal_remembers_original_status(self):
+        proposal = self._create_proposal(Decimal("20.00"))
+
+        loaded = FoodProposal.objects.get(pk=proposal.pk)
+        loaded.isApproved = True
+
+        self.assertIsNone(loaded._loaded_isApproved)
+
 
 class ModeratorWorkflowTests(APITestCase):
     def setUp(self):
@@ -784,6 +1034,92 @@ class ModeratorWorkflowTests(APITestCase):
             entry_micronutrients.count(), 4, "All 4 micronutrients should be copied"
         )
 
+    def test_edit_proposal_updates_only_given_fields(self):
+        food_entry = FoodEntry.objects.create(
+            name="Typo Bagle",
+            category="Bakery",
+            servingSize=100,
+            caloriesPerServing=250,
+            proteinContent=10,
+            fatContent=1.5,
+            carbohydrateContent=50,
+            nutritionScore=5.5,
+            validated=False,
+            createdBy=self.proposer,
+        )
+        proposal = FoodProposal.objects.create(
+            food_entry=food_entry,
+            proposedBy=self.proposer,
+        )
+
+        url = reverse("moderation-food-proposals-edit", args=[proposal.id])
+        response = self.client.patch(
+            url,
+            {
+                "name": "Plain Bagel",
+                "proteinContent": 11,
+                "micronutrients": {"Calcium, Ca (mg)": 20.0},
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Plain Bagel")
+        self.assertEqual(response.data["proteinContent"], 11)
+        self.assertEqual(response.data["micronutrients"], {"Calcium, Ca (mg)": 20.0})
+
+        food_entry.refresh_from_db()
+        self.assertEqual(food_entry.name, "Plain Bagel")
+        self.assertEqual(food_entry.proteinContent, 11)
+        self.assertEqual(food_entry.category, "Bakery")
+        self.assertEqual(food_entry.fatContent, 1.5)
+
+    def test_list_pending_proposals_returns_flat_food_fields(self):
+        food_entry = FoodEntry.objects.create(
+            name="Pending Lentil Soup",
+            category="Soups",
+            servingSize=250,
+            caloriesPerServing=180,
+            proteinContent=9,
+            fatContent=3,
+            carbohydrateContent=28,
+            dietaryOptions=["Vegan"],
+            nutritionScore=7.8,
+            imageUrl="https://example.com/soup.png",
+            validated=False,
+            createdBy=self.proposer,
+        )
+        iron, _ = Micronutrient.objects.get_or_create(
+            name="Iron, Fe", defaults={"unit": "mg"}
+        )
+        FoodEntryMicronutrient.objects.create(
+            food_entry=food_entry, micronutrient=iron, value=3.456
+        )
+        proposal = FoodProposal.objects.create(
+            food_entry=food_entry,
+            proposedBy=self.proposer,
+        )
+
+        url = reverse("moderation-food-proposals-list")
+        response = self.client.get(url, {"isApproved": "null"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 1)
+        item = results[0]
+        self.assertEqual(item["id"], proposal.id)
+        self.assertEqual(item["name"], "Pending Lentil Soup")
+        self.assertEqual(item["category"], "Soups")
+        self.assertEqual(item["servingSize"], 250)
+        self.assertEqual(item["dietaryOptions"], ["Vegan"])
+        self.assertEqual(item["imageUrl"], "https://example.com/soup.png")
+        self.assertEqual(item["micronutrients"], {"Iron, Fe (mg)": 3.46})
+        self.assertIsNone(item["isApproved"])
+        self.assertEqual(
+            item["proposedBy"],
+            {"id": self.proposer.id, "username": self.proposer.username},
+        )
+
 
 class MicronutrientFilteringTests(TestCase):
     """Tests for micronutrient filtering in FoodCatalog"""
@@ -1227,6 +1563,47 @@ class MicronutrientFilteringTests(TestCase):
         self.assertEqual(beef["micronutrients"]["Zinc"]["value"], 3.0)
         self.assertIn("unit", beef["micronutrients"]["Zinc"])
 
+    def test_catalog_query_count_does_not_grow_with_foods(self):
+        """Micronutrients and allergens are prefetched, not loaded per food"""
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(reverse("get_foods"))
+
+        peanut = Allergen.objects.create(name="Peanut")
+        for i in range(3):
+            food = FoodAccessService.create_validated_food_entry(
+                name=f"Trail Mix {i}",
+                category="Snack",
+                servingSize=100,
+                caloriesPerServing=450,
+                proteinContent=12,
+                fatContent=30,
+                carbohydrateContent=40,
+                nutritionScore=4.0,
+            )
+            food.allergens.add(peanut)
+            FoodEntryMicronutrient.objects.create(
+                food_entry=food, micronutrient=self.iron, value=2.5
+            )
+            FoodEntryMicronutrient.objects.create(
+                food_entry=food, micronutrient=self.zinc, value=1.0
+            )
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(reverse("get_foods"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(after), len(before))
+
+    def test_serializer_single_food_joins_micronutrients(self):
+        """An unprefetched food loads its micronutrients in one query"""
+        food = FoodEntry.objects.get(pk=self.food3.pk)
+
+        # One query for allergens, one for micronutrient names and values
+        with self.assertNumQueries(2):
+            data = FoodEntrySerializer(food).data
+
+        self.assertEqual(data["micronutrients"]["Zinc"], {"value": 3.0, "unit": "mg"})
+
 
 class MacronutrientFilteringTests(TestCase):
     """Tests for macronutrient filtering in FoodCatalog"""
@@ -1774,3 +2151,141 @@ class PrivateFoodVisibilityTests(TestCase):
         self.assertIn(
             self.private_food, FoodAccessService.get_accessible_foods(user=None)
         )
+
+
+class ImageGenerationDispatchTests(TestCase):
+    def tearDown(self):
+        image_generation._inflight_ids.clear()
+        image_generation._cloudinary = None
+
+    def test_cloudinary_is_cached_only_once_configured(self):
+        credentials = (
+            "CLOUDINARY_CLOUD_NAME", "CLOUDINARY_API_KEY", "CLOUDINARY_API_SECRET"
+        )
+        with patch.dict(os.environ), override_settings(
+            **dict.fromkeys(credentials, "")
+        ):
+            for name in credentials:
+                os.environ.pop(name, None)
+            self.assertIsNone(image_generation._get_cloudinary())
+
+        with override_settings(**{name: "configured" for name in credentials}):
+            cloudinary = image_generation._get_cloudinary()
+            self.assertIsNotNone(cloudinary)
+
+        # Kept even after the settings change back
+        self.assertIs(image_generation._get_cloudinary(), cloudinary)
+
+    @patch("foods.image_generation.threading.Thread")
+    @patch("foods.image_generation.is_image_generation_enabled", return_value=True)
+    def test_duplicate_requests_for_same_entry_spawn_one_thread(
+        self, _enabled, thread_cls
+    ):
+        image_generation.generate_food_image_async(42, "Apple Pie")
+        image_generation.generate_food_image_async(42, "Apple Pie")
+
+        self.assertEqual(thread_cls.call_count, 1)
+
+    @patch("foods.image_generation.threading.Thread")
+    @patch("foods.image_generation.is_image_generation_enabled", return_value=True)
+    def test_failed_thread_start_releases_the_entry(self, _enabled, thread_cls):
+        thread_cls.return_value.start.side_effect = RuntimeError("can't start new thread")
+
+        with self.assertRaises(RuntimeError):
+            image_generation.generate_food_image_async(42, "Apple Pie")
+
+        self.assertNotIn(42, image_generation._inflight_ids)
+
+    @patch("foods.tasks.generate_food_image")
+    @patch("foods.tasks.is_image_generation_enabled", return_value=False)
+    def test_task_skips_without_retrying_when_not_configured(
+        self, _enabled, generate
+    ):
+        from foods.tasks import generate_food_image_task
+
+        self.assertFalse(generate_food_image_task(42, "Apple Pie"))
+        generate.assert_not_called()
+
+
+class ImageProxyCacheTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.url = "https://images.example.com/apple.png"
+        self.url_hash = hashlib.sha256(self.url.encode("utf-8")).hexdigest()
+
+    def tearDown(self):
+        food_views._image_cache_index.clear()
+        food_views._image_hits.clear()
+        food_views._image_hits_pending = 0
+        food_views._image_hits_written_at.clear()
+
+    def test_hot_image_is_served_without_queries_and_hits_are_flushed(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            entry = ImageCache.objects.create(
+                url_hash=self.url_hash,
+                original_url=self.url,
+                content_type="image/png",
+            )
+            entry.cached_file.save(f"{self.url_hash}.png", ContentFile(b"png-bytes"))
+            proxy_url = reverse("image_proxy")
+
+            response = self.client.get(proxy_url, {"url": self.url})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(b"".join(response.streaming_content), b"png-bytes")
+            response.close()
+
+            # The first hit was written right away; the next ones are batched
+            entry.refresh_from_db()
+            self.assertEqual(entry.access_count, 1)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(proxy_url, {"url": self.url})
+                response.close()
+
+            with patch.object(food_views, "_IMAGE_HIT_FLUSH_EVERY", 2):
+                response = self.client.get(proxy_url, {"url": self.url})
+                response.close()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.access_count, 3)
+
+    def test_cleanup_keeps_an_image_that_was_just_served(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            entry = ImageCache.objects.create(
+                url_hash=self.url_hash,
+                original_url=self.url,
+                content_type="image/png",
+            )
+            entry.cached_file.save(f"{self.url_hash}.png", ContentFile(b"png-bytes"))
+            long_ago = timezone.now() - timedelta(days=60)
+            ImageCache.objects.filter(pk=entry.pk).update(
+                created_at=long_ago, last_accessed=long_ago
+            )
+
+            response = self.client.get(reverse("image_proxy"), {"url": self.url})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response.close()
+
+            call_command("cleanup_image_cache", stdout=StringIO())
+
+        self.assertTrue(ImageCache.objects.filter(pk=entry.pk).exists())
+
+    def test_index_drops_the_least_recently_used_image(self):
+        hashes = ["a" * 64, "b" * 64, "c" * 64]
+        for url_hash in hashes:
+            ImageCache.objects.create(
+                url_hash=url_hash,
+                original_url=f"https://images.example.com/{url_hash[0]}.png",
+                cached_file=f"cached_images/{url_hash}.png",
+                content_type="image/png",
+            )
+
+        with patch.object(food_views, "_IMAGE_CACHE_INDEX_SIZE", 2):
+            food_views._lookup_cached_image(hashes[0])
+            food_views._lookup_cached_image(hashes[1])
+            # Using the first image again makes the second the oldest
+            food_views._lookup_cached_image(hashes[0])
+            food_views._lookup_cached_image(hashes[2])
+
+        self.assertEqual(list(food_views._image_cache_index), [hashes[0], hashes[2]])
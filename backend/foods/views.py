@@ -23,6 +23,7 @@ from foods.serializers import (
     PriceReportUpdateSerializer,
     PriceThresholdRecalculateSerializer,
     FoodProposalStatusSerializer,
+    prefetch_food_entry_relations,
 )
 from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveUpdateAPIView
 from rest_framework import status, generics
@@ -38,7 +39,10 @@ from django.http import HttpResponse, FileResponse, HttpResponseRedirect
 from django.core.files.base import ContentFile
 from django.utils.http import urlencode
 import hashlib
+import threading
+import time
 from urllib.parse import unquote
+from collections import Counter, OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
@@ -73,6 +77,27 @@ _image_cache_executor = ThreadPoolExecutor(
     max_workers=5, thread_name_prefix="image_cache"
 )
 
+# In-process index of cached images (url_hash -> (file name, content type))
+# so hot images are served without an ImageCache lookup. Least recently used
+# entries are dropped first once it is full.
+_IMAGE_CACHE_INDEX_SIZE = 4096
+_image_cache_index = OrderedDict()
+_image_cache_index_lock = threading.Lock()
+
+# Access statistics are counted in memory and written in one UPDATE per image
+# instead of a read-modify-write on every request. cleanup_image_cache deletes
+# images by access_count and last_accessed, so an image's first hit in this
+# process is written right away, and counts are flushed every few hits and
+# whenever an image's last write is older than the flush interval.
+_IMAGE_HIT_FLUSH_EVERY = 50
+_IMAGE_HIT_FLUSH_INTERVAL = 300  # seconds
+_image_hits = Counter()
+_image_hits_pending = 0
+_image_hits_flushed_at = time.monotonic()
+# url_hash -> time.monotonic() of the last write of that image's statistics
+_image_hits_written_at = {}
+_image_hits_lock = threading.Lock()
+
 
 
 
@@ -138,7 +163,7 @@ class FoodCatalog(ListAPIView):
         # Get accessible foods for the current user (validated + their own private foods)
         user = self.request.user if self.request.user.is_authenticated else None
         queryset = FoodAccessService.get_accessible_foods(user=user)
-        queryset = queryset.prefetch_related("micronutrient_values__micronutrient")
+        queryset = prefetch_food_entry_relations(queryset)
 
         # Get available categories from accessible foods
         available_categories = list(
@@ -798,7 +823,7 @@ class PrivateFoodView(APIView):
 
         if pk:
             food = get_object_or_404(
-                FoodEntry.objects.prefetch_related("micronutrient_values__micronutrient"),
+                prefetch_food_entry_relations(FoodEntry.objects.all()),
                 id=pk,
                 createdBy=user,
                 validated=False,
@@ -806,10 +831,9 @@ class PrivateFoodView(APIView):
             serializer = FoodEntrySerializer(food, context={'request': request})
             return Response(serializer.data, status=status.HTTP_200_OK)
 
-        foods = FoodEntry.objects.filter(
-            createdBy=user,
-            validated=False,
-        ).prefetch_related("micronutrient_values__micronutrient")
+        foods = prefetch_food_entry_relations(
+            FoodEntry.objects.filter(createdBy=user, validated=False)
+        )
 
         serializer = FoodEntrySerializer(
             foods, many=True, context={'request': request}
@@ -951,7 +975,21 @@ class FoodProposalSubmitView(APIView):
         responses={200: FoodProposalStatusSerializer(many=True)}
     )
     def get(self, request):
-        proposals = FoodProposal.objects.filter(proposedBy=request.user).order_by('-createdAt')
+        # Load only the columns FoodProposalStatusSerializer outputs
+        proposals = (
+            FoodProposal.objects.filter(proposedBy=request.user)
+            .select_related('food_entry')
+            .only(
+                'id',
+                'isApproved',
+                'createdAt',
+                'food_entry__name',
+                'food_entry__category',
+                'food_entry__servingSize',
+                'food_entry__imageUrl',
+            )
+            .order_by('-createdAt')
+        )
         serializer = FoodProposalStatusSerializer(proposals, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -1024,6 +1062,67 @@ def _download_and_cache_image(image_url, url_hash):
         print(f"Failed to cache image {image_url[:50]}...: {str(e)}")
 
 
+def _lookup_cached_image(url_hash):
+    """
+    Return (file name, content type) for a cached image, or None.
+    Misses are not remembered: the image may be cached in the background.
+    """
+    with _image_cache_index_lock:
+        cached = _image_cache_index.get(url_hash)
+        if cached is not None:
+            _image_cache_index.move_to_end(url_hash)
+            return cached
+
+    row = (
+        ImageCache.objects.filter(url_hash=url_hash)
+        .values_list("cached_file", "content_type")
+        .first()
+    )
+    if row is None or not row[0]:
+        return None
+
+    with _image_cache_index_lock:
+        _image_cache_index[url_hash] = row
+        _image_cache_index.move_to_end(url_hash)
+        if len(_image_cache_index) > _IMAGE_CACHE_INDEX_SIZE:
+            _image_cache_index.popitem(last=False)
+    return row
+
+
+def _record_image_hit(url_hash):
+    """Count a cache hit; write the counts when they are due."""
+    global _image_hits_pending, _image_hits_flushed_at
+
+    now = time.monotonic()
+    with _image_hits_lock:
+        _image_hits[url_hash] += 1
+        _image_hits_pending += 1
+        written_at = _image_hits_written_at.get(url_hash)
+        due = (
+            written_at is None
+            or now - written_at >= _IMAGE_HIT_FLUSH_INTERVAL
+            or now - _image_hits_flushed_at >= _IMAGE_HIT_FLUSH_INTERVAL
+            or _image_hits_pending >= _IMAGE_HIT_FLUSH_EVERY
+        )
+        if not due:
+            return
+        hits = dict(_image_hits)
+        _image_hits.clear()
+        _image_hits_pending = 0
+        _image_hits_flushed_at = now
+        for hit_hash in hits:
+            _image_hits_written_at.pop(hit_hash, None)
+            if len(_image_hits_written_at) >= _IMAGE_CACHE_INDEX_SIZE:
+                _image_hits_written_at.pop(next(iter(_image_hits_written_at)), None)
+            _image_hits_written_at[hit_hash] = now
+
+    accessed_at = timezone.now()
+    for hit_hash, count in hits.items():
+        ImageCache.objects.filter(url_hash=hit_hash).update(
+            access_count=F("access_count") + count, last_accessed=accessed_at
+        )
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def image_proxy(request):
@@ -1056,18 +1155,25 @@ def image_proxy(request):
 
     try:
         # Check if image is already cached using hash
-        cache_entry = ImageCache.objects.filter(url_hash=url_hash).first()
+        cached = _lookup_cached_image(url_hash)
+
+        if cached:
+            file_name, content_type = cached
+            try:
+                image_file = ImageCache._meta.get_field("cached_file").storage.open(
+                    file_name, "rb"
+                )
+            except OSError:
+                # Removed by cleanup since it was indexed; look it up again next time
+                with _image_cache_index_lock:
+                    _image_cache_index.pop(url_hash, None)
+                raise
 
-        if cache_entry and cache_entry.cached_file:
             # Update access statistics
-            cache_entry.access_count += 1
-            cache_entry.save(update_fields=["access_count", "last_accessed"])
+            _record_image_hit(url_hash)
 
             # Serve cached image
-            response = FileResponse(
-                cache_entry.cached_file.open("rb"),
-                content_type=cache_entry.content_type,
-            )
+            response = FileResponse(image_file, content_type=content_type)
             response["Cache-Control"] = "public, max-age=86400"  # Cache for 24 hours
             return response
 
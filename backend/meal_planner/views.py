@@ -22,6 +22,17 @@ from .serializers import (
 )
 
 
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string, accepting exactly what strptime would.
+
+    Well-formed dates take the C fast path of date.fromisoformat; anything
+    else (e.g. unpadded months) falls back to strptime for identical rules.
+    """
+    if len(value) == 10 and value[4] == '-' and value[7] == '-' and value.isascii():
+        return date.fromisoformat(value)
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
 class MealPlanListCreateView(generics.ListCreateAPIView):
     """List user's meal plans or create a new one"""
     permission_classes = [IsAuthenticated]
@@ -111,7 +122,7 @@ class DailyNutritionLogView(APIView):
         date_str = request.query_params.get('date')
         if date_str:
             try:
-                log_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                log_date = _parse_date(date_str)
             except ValueError:
                 return Response(
                     {'error': 'Invalid date format. Use YYYY-MM-DD.'},
@@ -151,7 +162,7 @@ class DailyNutritionHistoryView(generics.ListAPIView):
             end_date = date.today()
         else:
             try:
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+                end_date = _parse_date(end_date_str)
             except ValueError:
                 end_date = date.today()
         
@@ -159,7 +170,7 @@ class DailyNutritionHistoryView(generics.ListAPIView):
             start_date = end_date - timedelta(days=7)
         else:
             try:
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+                start_date = _parse_date(start_date_str)
             except ValueError:
                 start_date = end_date - timedelta(days=7)
         
@@ -195,7 +206,7 @@ class FoodLogEntryViewSet(viewsets.ModelViewSet):
         entry_date_str = request.data.get('date')
         if entry_date_str:
             try:
-                entry_date = datetime.strptime(entry_date_str, '%Y-%m-%d').date()
+                entry_date = _parse_date(entry_date_str)
             except ValueError:
                 return Response(
                     {'error': 'Invalid date format. Use YYYY-MM-DD.'},
@@ -285,7 +296,7 @@ class PlannedFoodEntryViewSet(viewsets.ModelViewSet):
         entry_date_str = request.data.get('date')
         if entry_date_str:
             try:
-                entry_date = datetime.strptime(entry_date_str, '%Y-%m-%d').date()
+                entry_date = _parse_date(entry_date_str)
             except ValueError:
                 return Response(
                     {'error': 'Invalid date format. Use YYYY-MM-DD.'},
@@ -577,7 +588,7 @@ def log_saved_meal_plan(request, pk):
     date_str = request.data.get('date')
     if date_str:
         try:
-            log_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            log_date = _parse_date(date_str)
         except ValueError:
             return Response(
                 {'error': 'Invalid date format. Use YYYY-MM-DD.'},
@@ -636,7 +647,7 @@ def plan_saved_meal_plan(request, pk):
     date_str = request.data.get('date')
     if date_str:
         try:
-            log_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            log_date = _parse_date(date_str)
         except ValueError:
             return Response(
                 {'error': 'Invalid date format. Use YYYY-MM-DD.'},
@@ -700,7 +711,7 @@ def create_saved_meal_plan_from_log(request):
     # Get the date
     if date_str:
         try:
-            log_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            log_date = _parse_date(date_str)
         except ValueError:
             return Response(
                 {'error': 'Invalid date format. Use YYYY-MM-DD.'},
@@ -172,6 +172,10 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_RENDERER_CLASSES": (
+        "project.utils.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 12,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
@@ -232,6 +236,20 @@ CLOUDINARY_CLOUD_NAME = os.environ.get("CLOUDINARY_CLOUD_NAME", "")
 CLOUDINARY_API_KEY = os.environ.get("CLOUDINARY_API_KEY", "")
 CLOUDINARY_API_SECRET = os.environ.get("CLOUDINARY_API_SECRET", "")
 
+# ===========================================
+# Celery Configuration
+# ===========================================
+# Background AI image generation is queued to Celery when a broker is set,
+# otherwise it runs in a background thread of the web process. The task goes
+# to the "image_generation" queue; its rate limit is enforced per worker, so
+# run exactly one worker on that queue (see docker-compose.yml).
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "")
+CELERY_TASK_ACKS_LATE = True
+
+# Directory for the URL cache kept by the broken image link migration
+# (foods 0012); must be writable by whoever runs migrate
+BROKEN_LINK_CACHE_DIR = Path(os.environ.get("BROKEN_LINK_CACHE_DIR", BASE_DIR))
+
 # drf-spectacular settings for OpenAPI/Swagger documentation
 SPECTACULAR_SETTINGS = {
     "TITLE": "NutriHub API",
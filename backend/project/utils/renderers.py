@@ -0,0 +1,52 @@
+"""
+JSON renderer backed by orjson.
+
+Matches DRF's JSONRenderer output: values orjson cannot encode natively
+(Decimal, lazy translations, datetimes...) go through DRF's own encoder,
+and U+2028/U+2029 are escaped the same way. Data orjson rejects (e.g.
+integers wider than 64 bits), indented (browsable API) output, non-default
+UNICODE_JSON/COMPACT_JSON settings and environments without orjson fall
+back to the stock renderer.
+
+One difference remains: NaN and infinite floats are rendered as null
+instead of raising under STRICT_JSON, since finding them would mean walking
+the whole payload in Python.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; DRF's renderer is used instead
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    if orjson is not None:
+        options = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape the line/paragraph separators, valid in JSON but not in
+        # JavaScript strings, as DRF does
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )